@@ -10,12 +10,25 @@ Functions
 apply_excel_adjustments_msgs(file_path, sheet_name, settings)
     Format the Excel tables as specified in the settings txt file.
 
-msgs_to_excel(chs, all_users_df, inps, setts)
+ch_msgs_to_excel(ch, all_users_df, all_chs_df, inps, setts, log=print)
+    Compile the messages of one Slack channel into an Excel workbook.
+
+get_sqlite_db_path(inps, setts)
+    Return the path to the SQLite database, or None if it is not requested.
+
+init_worker(all_users_df, all_chs_df, inps, setts)
+    Store the variables shared by all the channels in a worker process.
+
+ch_msgs_to_excel_in_worker(ch)
+    Compile the messages of one Slack channel in a worker process.
+
+msgs_to_excel(chs, all_users_df, all_chs_df, inps, setts)
     Compile messages in a Slack workspace into Excel workbooks.
 
 """
 import os
 import sys
+import multiprocessing
 import pandas as pd
 
 # Include the main repo directory (export_Slack/) and the src directory
@@ -29,6 +42,11 @@ import checkins
 import excel
 
 
+# Variables shared by all the channels when using a pool of processes. They
+# are set once per process by init_worker():
+WORKER_ARGS = {}
+
+
 def apply_excel_adjustments_msgs(file_path, ws_name, settings_msgs):
     """
     Format the Excel tables as specified in the settings txt file.
@@ -57,118 +75,320 @@ def apply_excel_adjustments_msgs(file_path, ws_name, settings_msgs):
     xl.save_changes()
 
 
-def msgs_to_excel(chs, all_users_df, inps, setts):
+def ch_msgs_to_excel(ch, all_users_df, all_chs_df, inps, setts, log=print):
     """
-    Compile messages in a Slack workspace into Excel workbooks.
+    Compile the messages of one Slack channel into an Excel workbook.
 
     Arguments
     ---------
-    chs : list
-        List with the names of the Slack channels to analyze.
+    ch : str
+        Name of the Slack channel to analyze.
     all_users_df : Pandas dataframe
         Dataframe with all the Slack user's information.
+    all_chs_df : Pandas dataframe
+        Dataframe with all the Slack channel's information.
     inps : parser.Parser(txt_path)
         Parsed variables from the inputs.txt file.
     setts : parser.Parser(txt_path)
         Parsed variables from the settings_messages.txt file.
+    log : function (optional. Default is print)
+        Function called with each of the progress messages.
+
+    Returns
+    -------
+    Name of the Excel file written for the channel, or None if the channel
+    has no messages.
 
     """
     s = slack.Slack(setts)
+    ch_name = ch
+    db_path = get_sqlite_db_path(inps, setts)
+    cache = slack.ChannelCache(setts.get("cache_path"),
+                               setts.get("cache_max_size_mb"))
+
+    # Retrieve the channel's messages with the users' information from the
+    # cache, if its JSON files did not change since they were cached:
+    if cache.enabled is True:
+        ch_key = s.get_ch_fingerprint(inps.get('slackexport_folder_path'), ch)
+        ch_msgs_df = cache.get(ch_key)
+    else:
+        ch_msgs_df = None
 
-    print("")
-    # Iterate over channel's folders:
-    for ch in chs:
-
+    if ch_msgs_df is not None:
+        log(f"{ch} Collected channel msgs from the cache")
+        if len(ch_msgs_df) < 1:
+            return None
+        ch_usrs_df = s.get_ch_usrs_df(ch_msgs_df, all_users_df)
+    else:
         # Collect all the current_channel's messages in ch_msgs_df:
         ch_msgs_df = s.get_ch_msgs_df(inps.get('slackexport_folder_path'), ch)
-        print(f"{ch} Collected channel msgs from the json files")
+        log(f"{ch} Collected channel msgs from the json files")
         if len(ch_msgs_df) < 1:
-            continue
+            return None
 
         # Collect all the users in the current channel:
         ch_usrs_df = s.get_ch_usrs_df(ch_msgs_df, all_users_df)
-        print(f"{ch} Collected users in current channel")
+        log(f"{ch} Collected users in current channel")
 
         # Use ch_usrs_df to fill in the user's information in ch_msgs_df:
         s.add_usrs_info_to_msgs_df(ch_msgs_df, ch_usrs_df)
-        print(f"{ch} Included the users info on ch_msgs_df")
-
-        # Replace user and team identifiers with their display_names whenever
-        # present in a message:
-        s.usr_id_to_name(ch_msgs_df, ch_usrs_df)
-        s.ch_id_to_name(ch_msgs_df)
-        s.parent_id_to_name(ch_msgs_df, ch_usrs_df)
-        print(f"{ch} User's id replaced by their names")
-
-        # Extract hyperlinks from messages, if present (extracted as a list;
-        # edit if needed):
-        s.extract_urls(ch_msgs_df)
-        print(f"{ch} URLs extracted from messages")
-
-        # Change format of the time in seconds to a date in the CST time-zone:
-        s.ts_to_tz(ch_msgs_df, "ts", "msg_date")
-        s.ts_to_tz(ch_msgs_df, "json_mod_ts", "json_mod_date")
-        s.ts_to_tz(ch_msgs_df, "ts_latest_reply", "latest_reply_date")
-        s.ts_to_tz(ch_msgs_df, "ts_thread", "thread_date")
-        print(f"{ch} Formated the dates and times")
-
-        # Identify if text has emojis:
-        ch_msgs_df = s.id_emojis_in_text(ch_msgs_df)
-        print(f"{ch} Checked for emojis in messages")
-
-        # Parse for check-in messages:
-        ch_msgs_df = checkins.parse_reports(ch_msgs_df, setts)
-
-        ch_msgs_df = s.drop_extra_unparsed_rows(ch_msgs_df)
-        print(f"{ch} Parsed check-in messages")
-
-        # Build df with pruned messages:
-        sel_msgs_df = s.rm_automatic_msgs(ch_msgs_df)
-        sel_msgs_df = s.remove_emojis_in_text(sel_msgs_df)
-        sel_msgs_df = s.rm_short_msgs(sel_msgs_df, n_char=15)
-        print(f"{ch} Built df with selected rows")
-
-        # Build df with discarded messages (after being pruned):
-        auto_msgs = s.get_automatic_msgs(ch_msgs_df)
-        short_msgs = s.get_short_msgs(ch_msgs_df, n_char=15)
-        dis_msgs = pd.concat([auto_msgs, short_msgs],
-                             axis=0, ignore_index=False)
-        dis_msgs.sort_values(by="msg_date", inplace=True, ignore_index=True)
-        print(f"{ch} Built df with filtered-out messages")
-
-        # Rearrange columns:
-        column_names_order = setts.get("columns_order")
-        ch_msgs_df = ch_msgs_df[column_names_order]
-        sel_msgs_df = sel_msgs_df[column_names_order]
-        dis_msgs = dis_msgs[column_names_order]
-        print(f"{ch} Rearranged columns")
-
-        # Sort rows by msg_date:
-        ch_msgs_df.sort_values(by="msg_date", inplace=True, ignore_index=True)
-        sel_msgs_df.sort_values(by="msg_date", inplace=True, ignore_index=True)
-        dis_msgs.sort_values(by="msg_date", inplace=True, ignore_index=True)
-        print(f"{ch} Sorted rows by msg_date")
-
-        # Write ch_msgs_df to a .xlsx file:
+        log(f"{ch} Included the users info on ch_msgs_df")
+        if cache.enabled is True:
+            cache.put(ch_key, ch_msgs_df)
+
+    # Replace user and channel identifiers with their names, extract the
+    # hyperlinks and identify (and remove) the emojis, reading the text of
+    # each message only once:
+    s.normalize_text(ch_msgs_df, ch_usrs_df, all_chs_df)
+    s.parent_id_to_name(ch_msgs_df, ch_usrs_df)
+    log(f"{ch} Normalized the text of the messages")
+
+    # Change format of the time in seconds to a date in the CST time-zone:
+    s.ts_to_tz(ch_msgs_df, "ts", "msg_date")
+    s.ts_to_tz(ch_msgs_df, "json_mod_ts", "json_mod_date")
+    s.ts_to_tz(ch_msgs_df, "ts_latest_reply", "latest_reply_date")
+    s.ts_to_tz(ch_msgs_df, "ts_thread", "thread_date")
+    log(f"{ch} Formated the dates and times")
+
+    # Parse for check-in messages:
+    ch_msgs_df = checkins.parse_reports(ch_msgs_df, setts)
+
+    ch_msgs_df = s.drop_extra_unparsed_rows(ch_msgs_df)
+    if s.typed_dates is True:
+        s.parse_dates(ch_msgs_df)
+    log(f"{ch} Parsed check-in messages")
+
+    # Flag the messages to filter out (filter_rules in the settings):
+    s.classify_msgs(ch_msgs_df)
+
+    # Sort the messages by date, rearrange the columns and flag the messages
+    # that go to the sheet "Filtered-out messages", copying ch_msgs_df once:
+    column_names_order = setts.get("columns_order")
+    ch_msgs_df, filtered_out = s.partition_msgs(ch_msgs_df, column_names_order)
+    log(f"{ch} Partitioned and sorted the messages by msg_date")
+
+    # Name the .xlsx file after the dates of the first and last messages:
+    if s.typed_dates is True:
+        msgs_mindate = f"{ch_msgs_df['msg_date'].min():%Y-%m-%d}"
+        msgs_maxdate = f"{ch_msgs_df['msg_date'].max():%Y-%m-%d}"
+    else:
         msgs_mindate = ch_msgs_df["msg_date"].min().split(" ")[0]
         msgs_maxdate = ch_msgs_df["msg_date"].max().split(" ")[0]
-        ch = ch.replace(" ", "-")
-        ch_msgs_filename = f"{ch}_{msgs_mindate}_to_{msgs_maxdate}"
-        path = f"{inps.get('converted_directory')}"
-        path += "/" + f"{setts.get('dest_name_ext')}/{ch_msgs_filename}.xlsx"
-        with pd.ExcelWriter(path, engine="openpyxl") as writer:
-            sel_msgs_df.to_excel(writer, index=False,
-                                 sheet_name="Relevant messages")
-            dis_msgs.to_excel(writer, index=False,
-                              sheet_name="Filtered-out messages")
-            ch_msgs_df.to_excel(writer, index=False,
-                                sheet_name="All messages")
-
-        # Apply formatting of Excel worksheets:
-        apply_excel_adjustments_msgs(path, "All messages", setts)
-        apply_excel_adjustments_msgs(path, "Relevant messages", setts)
-        apply_excel_adjustments_msgs(path, "Filtered-out messages", setts)
-        print(f"{ch} Wrote curated messages to Excel \n")
+    ch = ch.replace(" ", "-")
+    ch_msgs_filename = f"{ch}_{msgs_mindate}_to_{msgs_maxdate}"
+    path = f"{inps.get('converted_directory')}"
+    path += "/" + f"{setts.get('dest_name_ext')}/{ch_msgs_filename}.xlsx"
+
+    # Write the dates as strings (if kept as datetime values until now):
+    s.format_dates(ch_msgs_df)
+
+    # Write ch_msgs_df to a .xlsx file:
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        ch_msgs_df[~filtered_out].to_excel(writer, index=False,
+                                           sheet_name="Relevant messages")
+        ch_msgs_df[filtered_out].to_excel(writer, index=False,
+                                          sheet_name="Filtered-out messages")
+        ch_msgs_df.to_excel(writer, index=False,
+                            sheet_name="All messages")
+
+    # Apply formatting of Excel worksheets:
+    apply_excel_adjustments_msgs(path, "All messages", setts)
+    apply_excel_adjustments_msgs(path, "Relevant messages", setts)
+    apply_excel_adjustments_msgs(path, "Filtered-out messages", setts)
+    log(f"{ch} Wrote curated messages to Excel")
+
+    # Write the messages into the SQLite database:
+    if db_path is not None:
+        ch_msgs_df["relevant"] = ~filtered_out
+        slack.write_msgs_to_sqlite(db_path, ch_name, f"{ch_msgs_filename}.xlsx",
+                                   ch_msgs_df)
+        log(f"{ch} Wrote messages to the SQLite database")
+    log("")
+
+    return f"{ch_msgs_filename}.xlsx"
+
+
+def get_sqlite_db_path(inps, setts):
+    """
+    Return the path to the SQLite database, or None if it is not requested.
+
+    Arguments
+    ---------
+    inps : parser.Parser(txt_path)
+        Parsed variables from the inputs.txt file.
+    setts : parser.Parser(txt_path)
+        Parsed variables from the settings_messages.txt file.
+
+    Returns
+    -------
+    str or None
+
+    """
+    db_name = setts.get("sqlite_db_name")
+    if db_name is None or db_name == "":
+        return None
+    return f"{inps.get('converted_directory')}/{setts.get('dest_name_ext')}/{db_name}"
+
+
+def init_worker(all_users_df, all_chs_df, inps, setts):
+    """
+    Store the variables shared by all the channels in a worker process.
+
+    It is called once when each process of the pool is started, so the
+    variables are sent to each process only once.
+
+    Arguments
+    ---------
+    all_users_df : Pandas dataframe
+        Dataframe with all the Slack user's information.
+    all_chs_df : Pandas dataframe
+        Dataframe with all the Slack channel's information.
+    inps : parser.Parser(txt_path)
+        Parsed variables from the inputs.txt file.
+    setts : parser.Parser(txt_path)
+        Parsed variables from the settings_messages.txt file.
+
+    """
+    WORKER_ARGS["all_users_df"] = all_users_df
+    WORKER_ARGS["all_chs_df"] = all_chs_df
+    WORKER_ARGS["inps"] = inps
+    WORKER_ARGS["setts"] = setts
+
+    # Index the source directory (if not inherited from the parent process):
+    sparser.index_export(inps.get("slackexport_folder_path"))
+
+
+def ch_msgs_to_excel_in_worker(ch):
+    """
+    Compile the messages of one Slack channel in a worker process.
+
+    Arguments
+    ---------
+    ch : str
+        Name of the Slack channel to analyze.
+
+    Returns
+    -------
+    lines : list
+        List with the progress messages, to be printed by the parent process.
+
+    excel_file : str
+        Output of ch_msgs_to_excel().
+
+    """
+    lines = []
+    excel_file = ch_msgs_to_excel(ch, WORKER_ARGS["all_users_df"],
+                                  WORKER_ARGS["all_chs_df"], WORKER_ARGS["inps"],
+                                  WORKER_ARGS["setts"], log=lines.append)
+    return lines, excel_file
+
+
+def msgs_to_excel(chs, all_users_df, all_chs_df, inps, setts):
+    """
+    Compile messages in a Slack workspace into Excel workbooks.
+
+    The channels are processed one at a time, unless the variable
+    "processes" of the settings txt file asks for a pool of processes.
+
+    If "incremental_export" is True in the inputs txt file, only the channels
+    whose JSON files changed since the last run are converted again. The
+    JSON files used for each channel are recorded in a manifest file in the
+    destination directory.
+
+    Arguments
+    ---------
+    chs : list
+        List with the names of the Slack channels to analyze.
+    all_users_df : Pandas dataframe
+        Dataframe with all the Slack user's information.
+    all_chs_df : Pandas dataframe
+        Dataframe with all the Slack channel's information.
+    inps : parser.Parser(txt_path)
+        Parsed variables from the inputs.txt file.
+    setts : parser.Parser(txt_path)
+        Parsed variables from the settings_messages.txt file.
+
+    """
+    s = slack.Slack(setts)
+    src_path = inps.get("slackexport_folder_path")
+    dest_path = f"{inps.get('converted_directory')}/{setts.get('dest_name_ext')}"
+
+    # Select the channels whose JSON files changed since the last run. All of
+    # them are converted if the settings or the users/channels changed:
+    incremental = inps.get("incremental_export") is True
+    if incremental is True:
+        manifest = slack.read_manifest(dest_path)
+        workspace_info = {
+            "settings": slack.hash_file(setts.txt_path),
+            "users": slack.hash_file(f"{src_path}/{setts.get('users_json_name')}"),
+            "channels": slack.hash_file(f"{src_path}/{setts.get('channels_json_name')}")}
+        if manifest["workspace"] != workspace_info:
+            manifest = {"workspace": workspace_info, "channels": {}}
+
+        chs_files_info = {}
+        chs_to_convert = []
+        for ch in chs:
+            prev = manifest["channels"].get(ch, {})
+            chs_files_info[ch] = s.get_ch_files_info(src_path, ch,
+                                                     prev.get("json_files"))
+            prev_file = prev.get("excel_file")
+            if chs_files_info[ch] == prev.get("json_files") and \
+                    (prev_file is None or os.path.exists(f"{dest_path}/{prev_file}")):
+                print(f"{ch} Unchanged since the last run")
+            else:
+                chs_to_convert.append(ch)
+        chs = chs_to_convert
+
+    # Number of processes (0 means as many as CPU cores):
+    n_processes = setts.get("processes")
+    if n_processes is None:
+        n_processes = 1
+    elif isinstance(n_processes, bool) or not isinstance(n_processes, int) \
+            or n_processes < 0:
+        print(f"ERROR: processes = {n_processes!r} must be a non-negative"
+              + " integer." + "\n"
+              + "       Please review your input for the variable"
+              + ' "processes" in the file'
+              + f' "{os.path.basename(setts.txt_path)}".')
+        sys.exit()
+    elif n_processes == 0:
+        n_processes = os.cpu_count()
+    n_processes = min(n_processes, len(chs))
+
+    print("")
+    excel_files = []
+    if n_processes > 1:
+        # Build the URL extractor before starting the pool, so the processes
+        # inherit it when they are forked:
+        slack.get_url_extractor()
+
+        # Send each channel to a pool of processes and print the progress
+        # messages of each channel (in order) as they finish:
+        with multiprocessing.Pool(n_processes, initializer=init_worker,
+                                  initargs=(all_users_df, all_chs_df, inps,
+                                            setts)) as pool:
+            for lines, excel_file in pool.imap(ch_msgs_to_excel_in_worker, chs):
+                for line in lines:
+                    print(line)
+                excel_files.append(excel_file)
+    else:
+        # Iterate over channel's folders:
+        for ch in chs:
+            excel_files.append(ch_msgs_to_excel(ch, all_users_df, all_chs_df,
+                                                inps, setts))
+
+    # Update the manifest with the channels converted in this run:
+    if incremental is True:
+        for ch, excel_file in zip(chs, excel_files):
+            # The name of the Excel file contains the dates of the first and
+            # last messages, so remove the file of the previous run if needed:
+            prev_file = manifest["channels"].get(ch, {}).get("excel_file")
+            if prev_file not in (None, excel_file) \
+                    and os.path.exists(f"{dest_path}/{prev_file}"):
+                os.remove(f"{dest_path}/{prev_file}")
+            manifest["channels"][ch] = {"json_files": chs_files_info[ch],
+                                        "excel_file": excel_file}
+        slack.write_manifest(manifest, dest_path)
 
     print("Done")
 
@@ -204,6 +424,10 @@ if __name__ == "__main__":
                                     inputs.get('slackexport_folder_path'),
                                     kill=True)
 
+    # Walk the source directory once, so the channels and JSON files are
+    # listed from memory afterwards:
+    sparser.index_export(inputs.get('slackexport_folder_path'))
+
     # List the Slack channels to be analyzed:
     flag_all_chs = sparser.set_flag_analyze_all_chs(inputs.get('chosen_channel_name'))
     if flag_all_chs is True:
@@ -224,10 +448,13 @@ if __name__ == "__main__":
 
     # -------------------------------------------------------------------------
     print("\n", "Building dataframes and writing Excel files...")
+    print(f"Decoding the JSON files with {slack.JSON_BACKEND}.")
 
-    # Create the path where the files will be saved:
+    # Create the path where the files will be saved (keeping the files of the
+    # previous run in incremental mode):
     sparser.make_dest_path(
-        f"{inputs.get('converted_directory')}/{settings.get('dest_name_ext')}")
+        f"{inputs.get('converted_directory')}/{settings.get('dest_name_ext')}",
+        replace=inputs.get("incremental_export") is not True)
 
     # Get dataframes with the channels info:
     all_channels_df = slack.Slack(settings).get_all_channels_info(
@@ -250,5 +477,11 @@ if __name__ == "__main__":
         settings.get("users_excel_name").split(".")[0],
         f"{inputs.get('converted_directory')}/{settings.get('dest_name_ext')}")
 
+    # Write the channels and users into the SQLite database if requested by
+    # user:
+    if get_sqlite_db_path(inputs, settings) is not None:
+        slack.write_workspace_to_sqlite(get_sqlite_db_path(inputs, settings),
+                                        all_channels_df, all_usrs_df)
+
     # Write the Excel files of the given channel(s):
-    msgs_to_excel(chs2analyze, all_usrs_df, inputs, settings)
+    msgs_to_excel(chs2analyze, all_usrs_df, all_channels_df, inputs, settings)
@@ -77,34 +77,43 @@ def checkins_to_excel(setts):
     """
     s = slack.Slack(setts)
 
-    for file in os.listdir(setts.get("excel_channels_path")):
+    # Load the relevant messages of each channel, either from the SQLite
+    # database or from the channels' Excel files:
+    if setts.get("sqlite_db_path") not in (None, ""):
+        chs_dfs = slack.read_msgs_from_sqlite(setts.get("sqlite_db_path"))
+    else:
+        chs_dfs = {}
+        for file in os.listdir(setts.get("excel_channels_path")):
 
-        # Check that the Excel file corresponds to a Slack channel:
-        if sparser.check_ch(str(file).split(".")[0], setts.get("jsons_source_path")) is True:
+            # Check that the Excel file corresponds to a Slack channel:
+            if sparser.check_ch(str(file).split(".")[0], setts.get("jsons_source_path")) is True:
 
-            # If so, load the Excel sheet into a dataframe:
-            ch_df = pd.read_excel(f"{setts.get('excel_channels_path')}/{file}",
-                                  engine="openpyxl",
-                                  sheet_name="Relevant messages")
+                # If so, load the Excel sheet into a dataframe:
+                chs_dfs[file] = pd.read_excel(f"{setts.get('excel_channels_path')}/{file}",
+                                              engine="openpyxl",
+                                              sheet_name="Relevant messages")
 
-            # If the dataframe is not empty:
-            if len(ch_df) > 0:
+    chs_list = []
+    for file, ch_df in chs_dfs.items():
 
-                # Add channels and reports info:
-                ch_df = s.add_channel_info(f"{setts.get('excel_channels_path')}/{file}", ch_df)
-                ch_df = s.add_info_of_users_reports(ch_df)
+        # If the dataframe is not empty:
+        if len(ch_df) > 0:
 
-                # Handle missing values:
-                ch_df = clean.handle_missing_values(ch_df, setts.get("missing_value"))
+            # Add channels and reports info:
+            ch_df = s.add_channel_info(f"{setts.get('excel_channels_path')}/{file}", ch_df)
+            ch_df = s.add_info_of_users_reports(ch_df)
 
-                # Reorder columns:
-                ch_df = ch_df[setts.get("columns_order")]
+            # Handle missing values:
+            ch_df = clean.handle_missing_values(ch_df, setts.get("missing_value"))
 
-                # Concatanate ch_df to final dataframe:
-                if file == os.listdir(setts.get("excel_channels_path"))[0]:
-                    df = ch_df.copy()
-                else:
-                    df = pd.concat([df, ch_df], axis=0, ignore_index=False)
+            # Reorder columns:
+            ch_df = ch_df[setts.get("columns_order")]
+
+            # Collect ch_df to build the final dataframe:
+            chs_list.append(ch_df)
+
+    # Concatanate the dataframes of all the channels:
+    df = pd.concat(chs_list, axis=0, ignore_index=False)
 
     # Reset the indices of the dataframe:
     clean.reset_indices(df)
@@ -165,6 +174,10 @@ if __name__ == "__main__":
                                     settings.get("jsons_source_path"),
                                     kill=False)
 
+    # Walk the source directory once, so check_ch() lists the channels from
+    # memory for each Excel file:
+    sparser.index_export(settings.get("jsons_source_path"))
+
     # Check that the path with all the converted Excel files exists:
     sparser.check_path_in_user_file(settings.file_name + ".txt",
                                     "excel_channels_path",
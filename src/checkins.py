@@ -18,7 +18,6 @@ parse_reports(df, settings)
 
 # Import standard libraries:
 import pandas as pd
-import numpy as np
 import clean
 
 
@@ -46,6 +45,15 @@ class CheckIns:
 
     Methods
     -------
+    compile_keywords()
+        Build the lookup tables from normalized labels to check-in categories.
+
+    line_label(line)
+        Return the normalized text before ":" in a line of a check-in text.
+
+    line_category(line)
+        Return the check-in category defined in a text's line, if any.
+
     match_to_category(line, category_name)
         Check if a text's line contains the definition of a check-in category.
 
@@ -64,20 +72,17 @@ class CheckIns:
     extract_answers(blocks_list)
         Format the answer to each identified category in the check-in text.
 
-    create_empty_df_with_cats(n_rows, cols)
-        Return an empty dataframe with n_rows and given columns.
-
     projs_parsed_to_fraction(projs_parsed, idx, sample_msg_idx)
         Count projects_parsed as fractions of total projects.
 
     kws_parsed_to_fraction(projs_parsed, category_names)
         Count keywords_parsed as fractions of total keywords.
 
-    checkin_categories_to_df(df, category_names, answers)
-        Fill in the dataframe with the parsed check-in messages.
+    is_sample_msg(text)
+        Check if the text of a message contains any of the sample_text_list.
 
-    id_sample_msg(df)
-        Add "sample" in the column "projects_parsed" if msg is a sample report.
+    report_records(text, is_sample=False)
+        Return the projects parsed from a check-in message as dictionaries.
 
     """
 
@@ -88,6 +93,74 @@ class CheckIns:
         self.keywords_dictionary = self.settings.get("keywords_dictionary")
         self.index_keyword = self.settings.get("index_keyword")
         self.sample_text_list = self.settings.get("sample_text_list")
+        # Compile the keywords once into their normalized labels:
+        self.compile_keywords()
+
+    def compile_keywords(self):
+        """
+        Build the lookup tables from normalized labels to check-in categories.
+
+        The keywords are lowercased and their white spaces removed, as the
+        labels returned by line_label(). self.labels_of_category holds the
+        labels of each category of keywords_dictionary, and
+        self.category_of_label the category of each label, taking the first
+        category of all_keywords when a label is used by several of them.
+        """
+        self.labels_of_category = {}
+        for category_name, keywords in self.keywords_dictionary.items():
+            self.labels_of_category[category_name] = set(
+                keyword.lower().replace(" ", "") for keyword in keywords)
+        self.category_of_label = {}
+        for category_name in self.all_keywords:
+            for label in self.labels_of_category[category_name]:
+                self.category_of_label.setdefault(label, category_name)
+
+    def line_label(self, line):
+        """
+        Return the normalized text before ":" in a line of a check-in text.
+
+        Arguments
+        ---------
+        line : string
+            A line in the weekly report text.
+
+        Returns
+        -------
+        label : str or None
+            Lowercase text before ":" without white spaces, bullets and "_",
+            or None if the line does not contain ":".
+
+        """
+        # Prepare line
+        # Change all cases to lowercase and remove "*" (bold text):
+        line = line.lower().replace("*", "")
+        # Remove unwanted symbols and numbers (often used in bullet list):
+        line = line.lstrip("*-_•.◦ 1234567890").rstrip("*-_•.◦ 1234567890")
+        line = line.replace("&gt;", "")
+        # Remove white spaces:
+        line = line.replace(" ", "").replace("_", "")
+        # Check if a line contains ":" needed to define a keyword:
+        if ":" not in line:
+            return None
+        return line.split(":")[0]
+
+    def line_category(self, line):
+        """
+        Return the check-in category defined in a text's line, if any.
+
+        Arguments
+        ---------
+        line : string
+            A line in the weekly report text.
+
+        Returns
+        -------
+        str or None
+            Name of the first category of all_keywords whose keyword matches
+            the text before ":" in the line, or None.
+
+        """
+        return self.category_of_label.get(self.line_label(line))
 
     def match_to_category(self, line, category_name):
         """
@@ -111,26 +184,7 @@ class CheckIns:
         out : bool
 
         """
-        # Prepare line
-        # Change all cases to lowercase and remove "*" (bold text):
-        line = line.lower().replace("*", "")
-        # Remove unwanted symbols and numbers (often used in bullet list):
-        line = line.lstrip("*-_•.◦ 1234567890").rstrip("*-_•.◦ 1234567890")
-        line = line.replace("&gt;", "")
-        # Remove white spaces:
-        line = line.replace(" ", "").replace("_", "")
-        # Initialize boolean output as False:
-        out = False
-        # Check if a line contains ":" needed to define a keyword:
-        if ":" in line:
-            for keyword in self.keywords_dictionary[category_name]:
-                keyword_ = keyword.lower().replace(" ", "")
-                line_ = (line.split(":")[0]).lower().replace(" ", "")
-                # Check if a line contains a keyword in the check-in category:
-                if keyword_ == line_:
-                    out = True
-                    break
-        return out
+        return self.line_label(line) in self.labels_of_category[category_name]
 
     def get_idx_of_lines_with_cat(self, text):
         """
@@ -158,11 +212,10 @@ class CheckIns:
         if text != "":
             text_to_lines = text.splitlines()
             for i, line in enumerate(text_to_lines):
-                for category_name in self.all_keywords:
-                    if self.match_to_category(line, category_name) is True:
-                        indices_start_of_category.append(i)
-                        category_names.append(category_name)
-                        break
+                category_name = self.line_category(line)
+                if category_name is not None:
+                    indices_start_of_category.append(i)
+                    category_names.append(category_name)
         return indices_start_of_category, category_names
 
     def group_lines(self, text, indices_start_of_category):
@@ -197,7 +250,7 @@ class CheckIns:
             # Add the lines into a new entry in the output list:
             blocks.append(text_to_lines[begin:end])
         # Add the last category to the output list:
-        blocks.append(text_to_lines[end:])
+        blocks.append(text_to_lines[indices_start_of_category[-1]:])
 
         return blocks
 
@@ -286,20 +339,15 @@ class CheckIns:
         for block in blocks_list:
             ans = ""
             for line in block:
-                # Initialize the line_matches boolean to False:
-                line_matches = False
                 # If line contains a keyword, add to "ans" the text after
                 # ":" and remove unwanted symbols:
-                for category in self.all_keywords:
-                    if self.match_to_category(line, category) is True:
-                        line_matches = True
-                        ans += line.split(":")[1]
-                        ans = ans.lstrip("*-_•.◦ 1234567890")
-                        ans = ans.rstrip("*-_•.◦ 1234567890")
-                        ans = ans.replace("*", "").replace("&gt;", "")
-                        break
+                if self.line_category(line) is not None:
+                    ans += line.split(":")[1]
+                    ans = ans.lstrip("*-_•.◦ 1234567890")
+                    ans = ans.rstrip("*-_•.◦ 1234567890")
+                    ans = ans.replace("*", "").replace("&gt;", "")
                 # If line doesn't contain a keyword, add the line as it is:
-                if line_matches is False:
+                else:
                     ans += line
             # Check that the answer is not being parsed as missing_value:
             if ans.lower() == "none":
@@ -312,62 +360,6 @@ class CheckIns:
 
         return answers
 
-    def create_empty_df_with_cats(self, n_rows, cols):
-        """
-        Return an empty dataframe with n_rows and given columns.
-
-        The column index_ is for the internal development of the code. It can be
-        removed at the end.
-
-        Arguments
-        ---------
-        n_rows : int
-            Number of empty rows to include when defining the Pandas dataframe.
-
-        cols : list
-            List the names of the dataframe columns.
-
-        Returns
-        -------
-        df : Pandas dataframe
-
-        """
-        # Create empty dataframe with n_rows:
-        df = pd.DataFrame([[np.nan]*n_rows]*len(cols)).T
-        # Assign the columns of the dataframe:
-        df.columns = cols
-        # Assign the type of the dataframe:
-        df = df.astype("object")
-        return df
-
-    def id_sample_msg(self, df):
-        """
-        Add "sample" in the column "projects_parsed" if msg is a sample report.
-
-        A "sample" message is a message that contains the instructions of how
-        to correctly write a check-in report.
-
-        Arguments
-        ---------
-        df : Pandas dataframe
-
-        Returns
-        -------
-        indices : list
-            List with the index of "sample" messages.
-
-        """
-        indices = []
-        for i in list(df.index):
-            text_i = df.at[i, "text"]
-            for sample_text in self.sample_text_list:
-                if sample_text in text_i:
-                    df.loc[i, "projects_parsed"] = "sample"
-                    indices.append(i)
-                else:
-                    df.loc[i, "projects_parsed"] = ""
-        return indices
-
     def projs_parsed_to_fraction(self, projs_parsed, idx, sample_msg_idx):
         """
         Count projects_parsed as fractions of total projects.
@@ -444,40 +436,74 @@ class CheckIns:
                            f"/{len(self.all_keywords)}")
         return kws
 
-    def checkin_categories_to_df(self, df, category_names, answers):
+    def is_sample_msg(self, text):
         """
-        Fill in the dataframe with the parsed check-in messages.
-
-        Take the empty dataframe created with the function
-        "create_empty_df_with_cats(n_rows)" and fills the cells with the
-        "answers" to the categories that were correctly identified in the text.
-        Multiple projects are stored in multiple rows while preserving the
-        identification information of the message.
+        Check if the text of a message contains any of the sample_text_list.
 
         Arguments
         ---------
-        df : Pandas dataframe
+        text : str
+            Text from the check-in message.
 
-        category_name : list
-            Name of the check-in category.
+        Returns
+        -------
+        bool
 
-        answers : list
-            List of strings, where each string corresponds to the
-            "answer" of a given category.
+        """
+        for sample_text in self.sample_text_list:
+            if sample_text in text:
+                return True
+        return False
+
+    def report_records(self, text, is_sample=False):
+        """
+        Return the projects parsed from a check-in message as dictionaries.
+
+        Each dictionary holds the answers to the categories of one project
+        (the categories not found are left out), with its "projects_parsed"
+        and "keywords_parsed". A message without projects returns a single
+        dictionary. The categories written before the first project are added
+        to the first project.
+
+        Arguments
+        ---------
+        text : str
+            Text from the check-in message.
+
+        is_sample : bool (optional. Default value is False)
+            True if the message is a "sample" message.
 
         Returns
         -------
-        df : Pandas dataframe
+        records : list
+            List of dictionaries, one per project.
 
         """
-        project_counter = -1
-        for i, cat in enumerate(category_names):
-            if cat == self.index_keyword:
-                project_counter += 1
-            df.at[project_counter, cat] = answers[i]
-        return df
+        cat_idx, cat_names = self.get_idx_of_lines_with_cat(text)
+        projs_parsed = self.count_idx_kw(cat_names, self.index_keyword)
 
+        # Fill one record per project with the parsed categories:
+        records = [{} for _ in range(max(projs_parsed, 1))]
+        if len(cat_idx) > 0 and projs_parsed > 0:
+            blocks_list = self.group_lines(text, cat_idx)
+            answers = self.extract_answers(blocks_list)
+            project_counter = -1
+            for cat, answer in zip(cat_names, answers):
+                if cat == self.index_keyword:
+                    project_counter += 1
+                records[max(project_counter, 0)][cat] = answer
 
+        # Count the number of projects and keywords parsed:
+        projects_parsed = self.projs_parsed_to_fraction(
+            projs_parsed, 0, [0] if is_sample is True else [])
+        keywords_parsed = self.kws_parsed_to_fraction(projs_parsed, cat_names)
+        for k, record in enumerate(records):
+            if isinstance(projects_parsed, list):
+                record["projects_parsed"] = projects_parsed[k]
+            else:
+                record["projects_parsed"] = projects_parsed
+            record["keywords_parsed"] = keywords_parsed[k]
+        return records
 
 
 def parse_reports(df, settings):
@@ -504,60 +530,24 @@ def parse_reports(df, settings):
     # Create instance of class CheckIns:
     ci = CheckIns(settings)
 
-    # Identify rows with sample text:
-    sample_msg_idx = ci.id_sample_msg(df.copy())
-
-    for i in range(len(df)):
-
-        # Build the dataframe with the columns pertaining to a check-in
-        # message.
-        cat_idx, cat_names = ci.get_idx_of_lines_with_cat(df.at[i, "text"])
-        projs_parsed = ci.count_idx_kw(cat_names, ci.index_keyword)
-
-        # Create empty df with check-in categories:
-        cols = list(ci.all_keywords) + ["projects_parsed",
-                                          "keywords_parsed", "index_"]
-        if projs_parsed == 0 or i in sample_msg_idx:
-            df_i_report = ci.create_empty_df_with_cats(1, cols)
-        else:
-            df_i_report = ci.create_empty_df_with_cats(projs_parsed, cols)
-
-        # Fill the empty df with the parsed categories:
-        if len(cat_idx) > 0 and projs_parsed > 0:
-            blocks_list = ci.group_lines(df.at[i, "text"], cat_idx)
-            answers = ci.extract_answers(blocks_list)
-            df_i_report = ci.checkin_categories_to_df(
-                df_i_report, cat_names, answers)
-
-        # Count the number of projects and keywords parsed:
-        df_i_report["projects_parsed"] = ci.projs_parsed_to_fraction(
-            projs_parsed, i, sample_msg_idx)
-        df_i_report["keywords_parsed"] = ci.kws_parsed_to_fraction(
-            projs_parsed, cat_names)
-
-        df_i_report["index_"] = i
-        df_i_report = clean.handle_missing_values(df_i_report, ci.missing_value)
-
-        # Build the dataframe with the original information and full text.
-        # Rows are duplicated as many times as projects in the checkin msg:
-        df_i_msg = pd.DataFrame([list(df.loc[i].values)]*len(df_i_report))
-        df_i_msg.columns = df.columns
-        df_i_msg["index"] = i
-        df_i_msg = clean.handle_missing_values(df_i_msg, ci.missing_value)
-
-        # Horizontally concatenate df_i_msg and df_i_report for i-th
-        # message:
-        df_i_all = pd.concat(
-            [df_i_msg, df_i_report], axis=1, ignore_index=True)
-        df_i_all.columns = list(df_i_msg.columns) + list(df_i_report.columns)
-        df_i_all = clean.handle_missing_values(df_i_all, ci.missing_value)
-
-        # Initialized the parsed_df dataframe if parsing the first row:
-        if i == 0:
-            parsed_df = df_i_all.copy()
-        # Vertically concatenate parsed_df and df_i_all:
-        else:
-            parsed_df = pd.concat(
-                [parsed_df, df_i_all], axis=0, ignore_index=True)
+    # Parse each message into one record per project, keeping the position
+    # of its message:
+    msg_rows = []
+    records = []
+    for i, text in enumerate(df["text"]):
+        for record in ci.report_records(text, ci.is_sample_msg(text)):
+            record["index_"] = i
+            records.append(record)
+            msg_rows.append(i)
+
+    # Build the dataframe once. Rows of the messages are repeated as many
+    # times as projects in the check-in message:
+    df_msgs = df.iloc[msg_rows].reset_index(drop=True)
+    df_msgs["index"] = msg_rows
+    cols = list(ci.all_keywords) + ["projects_parsed", "keywords_parsed",
+                                    "index_"]
+    df_reports = pd.DataFrame.from_records(records, columns=cols)
+    parsed_df = pd.concat([df_msgs, df_reports], axis=1)
+    parsed_df = clean.handle_missing_values(parsed_df, ci.missing_value)
 
     return parsed_df
@@ -12,24 +12,199 @@ Classes
 -------
 Slack
 
+ChannelCache(cache_path, max_size_mb)
+
+MsgFilter(rules=None, valid_columns=None, settings_file=None)
+
+OfflineURLExtract(tlds_path, **kwargs)
+
 Functions
 ---------
+check_filter_condition(cond, valid_columns=None)
+    Return the error found in a condition of filter_rules, or None.
+
 write_info_to_file(flag, df, filename, path)
+    Write a given dataframe to an Excel file.
+
+decode_json(f)
+    Decode the content of a JSON file with the available JSON backend.
+
+hash_file(file_path)
+    Return the SHA-1 hash of the content of a file.
+
+read_manifest(path)
+    Read the manifest of a previous run from the destination directory.
+
+write_manifest(manifest, path)
+    Write the manifest of the current run into the destination directory.
+
+write_workspace_to_sqlite(db_path, chs_df, usrs_df)
+    Write the channels and users tables of the SQLite database.
+
+write_msgs_to_sqlite(db_path, ch_name, ch_file, df)
+    Write the messages of a channel into the SQLite database.
+
+read_msgs_from_sqlite(db_path)
+    Read the relevant messages of each channel from the SQLite database.
+
+rewrite_mentions(text, usrs_names, mentions=None)
+    Replace the mentions of users in a text with their names.
+
+rewrite_ch_links(text, chs_names)
+    Replace the links to channels in a text with their names.
+
+compile_urls_pattern(urls_to_show)
+    Return a compiled pattern matching any of the given strings.
+
+get_url_extractor()
+    Return the instance of URLExtract shared by all the channels.
+
+find_urls(text)
+    Return the URLs found in the text of a message.
+
+find_bare_urls(text)
+    Return the URLs found by URLExtract in a text without Slack links.
 
 """
 
 # Import standard Python libraries:
 import re
+import sys
 import os
+import json
+import pickle
+import hashlib
+import operator
+import sqlite3
 from datetime import datetime
-from json import load
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import idna
+import numpy as np
 import pandas as pd
+import urlextract
 from urlextract import URLExtract
 
+# Use the faster JSON library orjson to decode the JSON files if it is
+# installed, and Python's json module otherwise:
+try:
+    import orjson
+    JSON_BACKEND = "orjson"
+except ImportError:
+    orjson = None
+    JSON_BACKEND = "json"
+
 # Import customed Python modules:
 import excel
 import clean
 import checkins
+import sparser
+
+
+# Name of the file, in the destination directory, that keeps track of the
+# JSON files used to build each channel's Excel workbook:
+MANIFEST_NAME = "_manifest.json"
+
+# Version of the format of the dataframes stored in the ChannelCache. Change it
+# whenever the columns built by get_ch_msgs_df or add_usrs_info_to_msgs_df
+# or the fingerprint of Slack.get_ch_fingerprint change, so the old entries of
+# the cache are not used:
+CACHE_VERSION = 2
+
+# Number of rows inserted at once into the SQLite database:
+SQLITE_CHUNKSIZE = 5000
+
+# Columns of the "messages" table of the SQLite database with an index:
+SQLITE_INDICES = ["channel", "user", "msg_date", "thread_date"]
+
+# Columns of the "messages" table of the SQLite database with True/False
+# values, which SQLite stores as 1/0:
+SQLITE_BOOL_COLUMNS = ["deactivated", "is_bot", "contained_emoji"]
+
+# Store the numpy values found in the dataframes as Python values in SQLite
+# (otherwise they are stored as binary data):
+sqlite3.register_adapter(np.bool_, bool)
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.float64, float)
+
+# Pattern of the names of the JSON files with the messages of a channel
+# (YYYY-MM-DD.json):
+JSON_NAME_PATTERN = re.compile(r"(\d{4})(-)(\d{2})(-)(\d{2})(.)(json)")
+
+# Pattern of the mentions of a user in the text of a message (<@U1234567789>):
+MENTION_PATTERN = re.compile(r"<@([A-Za-z0-9]+)>")
+
+# Pattern of the links to a channel in the text of a message (<#C1234567789>
+# or <#C1234567789|channel_name>):
+CHANNEL_LINK_PATTERN = re.compile(r"<#([A-Za-z0-9]+)(?:\|([^>]*))?>")
+
+# Ids of the messages sent automatically by Slack (a user joined or left the
+# channel, the channel was renamed, etc.) and their pattern:
+AUTOMATIC_MSG_IDS = ["channel_join", "channel_leave", "channel_name",
+                     "channel_canvas_updated", "channel_convert_to_public"]
+AUTOMATIC_MSG_PATTERN = re.compile("|".join(AUTOMATIC_MSG_IDS))
+
+# Rules used by MsgFilter when filter_rules is not in the settings: automatic
+# messages (sent by Slack or by bots) and messages of 15 characters or less:
+FILTER_RULES = {
+    "is_automatic": [["msg_id", "in", AUTOMATIC_MSG_IDS],
+                     ["is_bot", "==", True]],
+    "is_short": [["text", "len<=", 15]]
+}
+
+# Comparisons that can be used in the conditions of filter_rules, also on the
+# number of characters of a column ("len<=", "len>", etc.):
+FILTER_COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt,
+                      ">=": operator.ge}
+# Columns of the messages when Slack.classify_msgs is called, which can be used
+# in filter_rules (besides the keywords of the check-in messages):
+FILTER_COLUMNS = ["msg_id", "msg_date", "user", "type", "text", "reply_count",
+                  "reply_users_count", "latest_reply_date", "thread_date",
+                  "parent_user_name", "json_name", "json_mod_date",
+                  "channel_folder", "name", "display_name", "is_bot",
+                  "deactivated", "URL(s)", "contained_emoji",
+                  "mentioned_users", "projects_parsed", "keywords_parsed"]
+
+FILTER_CONDITIONS = (["==", "!=", "in", "not in", "contains"]
+                     + list(FILTER_COMPARISONS.keys())
+                     + ["len" + comp for comp in FILTER_COMPARISONS.keys()])
+
+# Pattern of the emojis in the text of a message (:emoji_name:):
+EMOJI_PATTERN = re.compile(r"(:)([a-z0-9\_\-\+]+)(:)")
+
+# Pattern of the links written by Slack in the text of a message
+# (<https://url> or <https://url|label>):
+URL_LINK_PATTERN = re.compile(r"<((?:https?|ftp)://[^|>\s]+)(?:\|[^>]*)?>")
+
+# Pattern that any URL found by URLExtract must contain (a dot before its
+# top-level domain, or "localhost"). Texts without it are not searched:
+URL_HINT_PATTERN = re.compile(r"\.|localhost", re.IGNORECASE)
+
+# Maximum number of texts whose URLs are remembered by find_urls():
+URL_CACHE_SIZE = 100000
+
+# Instance of URLExtract shared by all the channels (see get_url_extractor):
+URL_EXTRACTOR = None
+
+# List of top-level domains used to find URLs, shipped with the repository
+# (IANA's tlds-alpha-by-domain.txt), so the list is never downloaded:
+TLDS_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "..", "dependencies",
+                                  "tlds-alpha-by-domain.txt")
+
+# Copy of the list shipped with urlextract, used if the one above is missing:
+TLDS_PACKAGE_PATH = os.path.join(os.path.dirname(urlextract.__file__), "data",
+                                 "tlds-alpha-by-domain.txt")
+
+# Columns with the dates built by Slack.ts_to_tz and their format as strings:
+DATE_COLUMNS = ["msg_date", "json_mod_date", "latest_reply_date",
+                "thread_date"]
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Columns of the dataframe built from the messages of a Slack JSON file:
+MSG_COLUMNS = ["msg_id", "ts", "user", "type", "text", "reply_count",
+               "reply_users_count", "ts_latest_reply", "ts_thread",
+               "parent_user_id"]
 
 
 # NOTE: There may be a better way of doing it, but the class Slack was defined
@@ -58,6 +233,15 @@ class Slack:
     get_jsons_in_ch(ch_path)
         Return a list with the names of the JSON files for a Slack channel.
 
+    read_json_file(filejson_path)
+        Load a JSON file and retrieve the time of its last modification.
+
+    get_ch_files_info(src_path, ch_name, prev_files_info=None)
+        Return the name, size, mtime and hash of a channel's JSON files.
+
+    get_ch_fingerprint(src_path, ch_name)
+        Return a hash identifying the inputs used to build a channel's messages.
+
     get_all_channels_info(source_path, chs_json_path)
         Export the channel's JSON file into a curated Pandas dataframe.
 
@@ -79,24 +263,48 @@ class Slack:
     ts_to_tz(df, orig_col_name, new_col_name)
         Rewrites timestamps into dates in a given column of a Pandas dataframe.
 
+    dates_to_str(dates)
+        Format a Pandas series of datetime values as strings.
+
+    format_dates(df)
+        Format the datetime values of the date columns in df as strings.
+
+    parse_dates(df)
+        Turn the date columns in df back into time-zone aware datetime values.
+
     extract_urls(df)
         Extract all the URLs found in the column "text" of a Pandas dataframe.
 
+    get_usrs_names(df_usrs)
+        Return a dictionary with the name to show for each user's id.
+
+    get_chs_names(df_chs)
+        Return a dictionary with the name of each channel's id.
+
     usr_id_to_name(df_msgs, df_usrs)
         Replace user_id with the user's display_name in df_msgs["text"].
 
     parent_id_to_name(df_msgs, df_usrs)
         Replace parent_user_id with its display_name in the dataframe.
 
-    ch_id_to_name(df_msgs)
+    ch_id_to_name(df_msgs, df_chs=None)
         Replace the channel_id with the channel's name in df_msgs["text"].
 
+    normalize_text(df_msgs, df_usrs, df_chs=None)
+        Normalize df_msgs["text"] and extract its features in a single pass.
+
     drop_extra_unparsed_rows(df_msgs)
         Drop empty rows in df_msgs created from misparsed messages.
 
     id_automatic_msgs(df_msgs)
         Return a list with the indices of the messages sent automatically.
 
+    automatic_msgs_mask(df_msgs)
+        Return a boolean series flagging the messages sent automatically.
+
+    classify_msgs(df_msgs)
+        Flag the messages of a channel following filter_rules.
+
     get_automatic_msgs(df_msgs)
         Return a dataframe with "automatic" messages.
 
@@ -112,12 +320,18 @@ class Slack:
     id_short_msgs(df_msgs, n_char)
         Identify msgs with fewer characters than n_char.
 
+    short_msgs_mask(df_msgs, n_char)
+        Return a boolean series flagging the msgs with at most n_char characters.
+
     get_short_msgs(df_msgs, n_char)
         Return a dataframe including only short messages.
 
     rm_short_msgs(df_msgs, n_char=15)
         Return a dataframe without short messages.
 
+    partition_msgs(df_msgs, columns)
+        Sort the messages by date and flag the filtered-out ones in one pass.
+
     add_channel_info(channel_path, channel_df)
         Add "channel", "export_dates" and "parsed_reports_in_channel" to df.
 
@@ -144,8 +358,30 @@ class Slack:
     def __init__(self, settings):
         # Retrieve the users' variables from the settings txt file:
         self.settings = settings
+        # Name of the settings txt file, used in the error messages:
+        self.settings_file = os.path.basename(self.settings.txt_path)
         self.missing_value = self.settings.get("missing_value")
         self.timezone = self.settings.get("timezone")
+        self.reading_threads = self.settings.get("reading_threads")
+        if self.reading_threads is None:
+            self.reading_threads = 8
+        elif isinstance(self.reading_threads, bool) \
+                or not isinstance(self.reading_threads, int) \
+                or self.reading_threads < 1:
+            print(f"ERROR: reading_threads = {self.reading_threads!r} must be"
+                  + " a positive integer." + "\n"
+                  + "       Please review your input for the variable"
+                  + ' "reading_threads" in the file'
+                  + f' "{self.settings_file}".')
+            sys.exit()
+        self.typed_dates = self.settings.get("typed_dates") is True
+        # Rules used by classify_msgs() to flag the messages to filter out:
+        all_keywords = self.settings.get("all_keywords")
+        if all_keywords is None:
+            all_keywords = []
+        self.msg_filter = MsgFilter(self.settings.get("filter_rules"),
+                                    FILTER_COLUMNS + list(all_keywords),
+                                    self.settings_file)
 
     def get_jsons_in_ch(self, ch_path):
         """
@@ -163,16 +399,111 @@ class Slack:
         list_names_dates : list
 
         """
-        ch_files = os.listdir(ch_path)
-        list_names_dates = []
-        for i in range(len(ch_files)):
-            match = re.match(
-                r"(\d{4})(-)(\d{2})(-)(\d{2})(.)(json)", ch_files[i]
-                )
-            if match is not None:
-                list_names_dates.append(ch_files[i])
+        ch_files = sparser.list_dir(ch_path)
+        list_names_dates = [name
+                            for name in ch_files
+                            if JSON_NAME_PATTERN.match(name) is not None]
         return list_names_dates
 
+    def read_json_file(self, filejson_path):
+        """
+        Load a JSON file and retrieve the time of its last modification.
+
+        Arguments
+        ---------
+        filejson_path : str
+            Path to the JSON file.
+
+        Returns
+        -------
+        slack_json : list or dict
+            Content of the JSON file.
+
+        mod_ts : float
+            Timestamp of the last modification of the JSON file.
+
+        """
+        with sparser.open_file(filejson_path) as f:
+            slack_json = decode_json(f)
+        mod_ts = sparser.get_size_mtime(filejson_path)[1]
+        return slack_json, mod_ts
+
+    def get_ch_files_info(self, src_path, ch_name, prev_files_info=None):
+        """
+        Return the name, size, mtime and hash of a channel's JSON files.
+
+        The content of a file is only hashed again if its size or mtime
+        differ from the ones in prev_files_info.
+
+        Arguments
+        ---------
+        src_path : str
+            Absolute path to the source directory.
+        ch_name : str
+            Name of the Slack channel.
+        prev_files_info : list (optional. Default is None)
+            Output of this method in a previous run (read from the manifest).
+
+        Returns
+        -------
+        List of dictionaries with keys "name", "size", "mtime" and "sha1",
+        sorted by the name of the JSON files.
+
+        """
+        prev_hashes = {}
+        if prev_files_info is not None:
+            prev_hashes = {(f["name"], f["size"], f["mtime"]): f["sha1"]
+                           for f in prev_files_info}
+
+        files_info = []
+        for json_name in sorted(self.get_jsons_in_ch(f"{src_path}/{ch_name}")):
+            filejson_path = f"{src_path}/{ch_name}/{json_name}"
+            size, mtime = sparser.get_size_mtime(filejson_path)
+            key = (json_name, size, mtime)
+            if key in prev_hashes:
+                sha1 = prev_hashes[key]
+            else:
+                sha1 = hash_file(filejson_path)
+            files_info.append({"name": json_name, "size": size,
+                               "mtime": mtime, "sha1": sha1})
+        return files_info
+
+    def get_ch_fingerprint(self, src_path, ch_name):
+        """
+        Return a hash identifying the inputs used to build a channel's messages.
+
+        The hash combines the resolved source path, the name of the channel,
+        the name, size and mtime of the channel's JSON files and of
+        users.json, and the missing_value. It changes if any of them changes,
+        without reading the content of the files. The channel and the source
+        path are included because the JSON files of different channels (or
+        exports) often have the same names, sizes and mtimes, e.g. in zip
+        files.
+
+        Arguments
+        ---------
+        src_path : str
+            Absolute path to the source directory (or to the zipped Slack
+            export).
+        ch_name : str
+            Name of the Slack channel.
+
+        Returns
+        -------
+        str with the hexadecimal hash.
+
+        """
+        json_list = sorted(self.get_jsons_in_ch(f"{src_path}/{ch_name}"))
+        fingerprint = [CACHE_VERSION, os.path.realpath(src_path), ch_name,
+                       self.missing_value,
+                       sparser.get_size_mtime(
+                           f"{src_path}/{self.settings.get('users_json_name')}")]
+        for json_name in json_list:
+            fingerprint.append(
+                [json_name,
+                 sparser.get_size_mtime(f"{src_path}/{ch_name}/{json_name}")])
+        return hashlib.sha1(json.dumps(fingerprint).encode()).hexdigest()
+
     def get_all_channels_info(self, source_path, chs_json_path):
         """
         Export the channel's JSON file into a curated Pandas dataframe.
@@ -191,7 +522,8 @@ class Slack:
 
         """
         # Export channels.json to dataframe:
-        chs_df = pd.read_json(chs_json_path)
+        with sparser.open_file(chs_json_path) as f:
+            chs_df = pd.DataFrame(decode_json(f))
         # Note:
         # The primary features of the dataframe are: id, name, created,
         # creator, is_archived, is_general, members, pins, topic, purpose.
@@ -211,7 +543,7 @@ class Slack:
             # function "get_jsons_in_ch_dir" to verify the names of the files
             # are in the correct format (yyyy-mm-dd.json):
             ch_path = f"{source_path}/{chs_df.at[i, 'name']}"
-            if os.path.exists(ch_path) is True:
+            if sparser.path_exists(ch_path) is True:
                 chs_df.at[i, "json_files"] = str(self.get_jsons_in_ch(ch_path))
             else:
                 chs_df.at[i, "json_files"] = self.missing_value
@@ -243,7 +575,8 @@ class Slack:
 
         """
         # Read users.json as a dataframe:
-        usrs_df = pd.read_json(usrs_json_path)
+        with sparser.open_file(usrs_json_path) as f:
+            usrs_df = pd.DataFrame(decode_json(f))
         # Note:
         # The primary features of usrs_df are: id, team_id, name, deleted,
         # color, real_name, tz, tz_label, tz_offset, profile, is_admin,
@@ -295,52 +628,45 @@ class Slack:
         "parent_user_id".
 
         """
-        # Initialize empty dataframe with given columns:
-        msgs_df = pd.DataFrame(
-            columns=["msg_id", "ts", "user", "type", "text", "reply_count",
-                     "reply_users_count", "ts_latest_reply", "ts_thread",
-                     "parent_user_id"])
+        # Initialize one list per column. The dataframe is built only once,
+        # after all the messages were read:
+        cols = {col: [] for col in MSG_COLUMNS}
 
-        # Iterate through each msg and add relevant information to msgs_df:
-        for msg in range(len(slack_json)):
+        # Iterate through each msg and add relevant information to the lists:
+        for msg in slack_json:
 
             # Add the message id:
-            if "client_msg_id" in slack_json[msg]:
-                msgs_df.at[msg, "msg_id"] = slack_json[msg]["client_msg_id"]
-            elif "subtype" in slack_json[msg]:
-                msgs_df.at[msg, "msg_id"] = slack_json[msg]["subtype"]
+            if "client_msg_id" in msg:
+                cols["msg_id"].append(msg["client_msg_id"])
+            elif "subtype" in msg:
+                cols["msg_id"].append(msg["subtype"])
             else:
-                msgs_df.at[msg, "msg_id"] = self.missing_value
-
-            # Add the message type:
-            if "type" in slack_json[msg]:
-                msgs_df.at[msg, "type"] = slack_json[msg]["type"]
-            else:
-                msgs_df.at[msg, "type"] = self.missing_value
+                cols["msg_id"].append(self.missing_value)
 
             # Add the latest reply to the message:
-            if "reply_count" in slack_json[msg]:
-                msgs_df.at[msg, "ts_latest_reply"] = slack_json[msg]["latest_reply"]
+            if "reply_count" in msg:
+                cols["ts_latest_reply"].append(msg["latest_reply"])
             else:
-                msgs_df.at[msg, "ts_latest_reply"] = self.missing_value
+                cols["ts_latest_reply"].append(self.missing_value)
 
-            # Add the id of the parent message if message is a reply:
-            if "parent_user_id" in slack_json[msg]:
-                msgs_df.at[msg, "ts_thread"] = slack_json[msg]["thread_ts"]
-                msgs_df.at[msg, "type"] = "thread"
+            # Add the id of the parent message and set the type to "thread"
+            # if message is a reply:
+            if "parent_user_id" in msg:
+                cols["ts_thread"].append(msg["thread_ts"])
+                cols["type"].append("thread")
             else:
-                msgs_df.at[msg, "ts_thread"] = self.missing_value
+                cols["ts_thread"].append(self.missing_value)
+                cols["type"].append(msg.get("type", self.missing_value))
 
             # Add the message itself:
-            msgs_df["text"] = msgs_df["text"].astype(str)
+            cols["text"].append(str(msg.get("text", self.missing_value)))
 
             # Add additional columns:
-            for col in ["ts", "user",  "text", "reply_count",
-                        "reply_users_count",  "parent_user_id"]:
-                msgs_df.at[msg, col] = slack_json[msg].get(col,
-                                                           self.missing_value)
+            for col in ["ts", "user", "reply_count", "reply_users_count",
+                        "parent_user_id"]:
+                cols[col].append(msg.get(col, self.missing_value))
 
-        return msgs_df
+        return pd.DataFrame(cols, columns=MSG_COLUMNS, dtype="object")
 
     def get_ch_msgs_df(self, src_path, ch_name):
         """
@@ -360,32 +686,38 @@ class Slack:
         "ts_thread", "parent_user_id".
 
         """
-        # Initialize empty dataframe with given columns:
-        ch_msgs_df = pd.DataFrame(
-            columns=["msg_id", "ts", "user", "type", "text", "reply_count",
-                     "reply_users_count", "ts_latest_reply", "ts_thread",
-                     "parent_user_id"])
-
         json_list = self.get_jsons_in_ch(f"{src_path}/{ch_name}")
 
-        # Iterate over JSONs inside the current channel's folder:
-        for file_day in range(len(json_list)):
-            filejson_path = f"{src_path}/{ch_name}/{json_list[file_day]}"
-
-            with open(filejson_path, encoding="utf-8") as f:
-                import_file_json = load(f)
-
-            # Get the dataframe from the given JSON file:
-            import_file_df = self.msg_json_to_df(import_file_json)
-
-            # Add some id_cols:
-            import_file_df["json_name"] = json_list[file_day]
-            import_file_df["json_mod_ts"] = os.path.getmtime(filejson_path)
-
-            # Concatenate the dataframe from the fiven JSON file with the
-            # "full" dataframe ch_msgs_df:
-            ch_msgs_df = pd.concat([ch_msgs_df, import_file_df],
-                                   axis=0, ignore_index=True)
+        # Sort the JSON files by date (their names are YYYY-MM-DD.json):
+        json_list = sorted(json_list)
+        paths = [f"{src_path}/{ch_name}/{json_name}" for json_name in json_list]
+
+        # Collect the dataframe of each JSON file, together with the
+        # information of the file itself:
+        days_dfs = []
+        json_mod_tss = []
+        n_msgs = []
+
+        # Read the JSON files inside the current channel's folder with a pool
+        # of threads. The results are returned in the order of json_list:
+        with ThreadPoolExecutor(max_workers=self.reading_threads) as pool:
+            for import_file_json, mod_ts in pool.map(self.read_json_file, paths):
+
+                # Get the dataframe from the given JSON file:
+                days_dfs.append(self.msg_json_to_df(import_file_json))
+                json_mod_tss.append(mod_ts)
+                n_msgs.append(len(days_dfs[-1]))
+
+        # Concatenate the dataframes of all the JSON files only once:
+        if len(days_dfs) > 0:
+            ch_msgs_df = pd.concat(days_dfs, axis=0, ignore_index=True)
+        else:
+            ch_msgs_df = pd.DataFrame(columns=MSG_COLUMNS, dtype="object")
+
+        # Add the id_cols, repeating the value of each JSON file as many
+        # times as messages in the file:
+        ch_msgs_df["json_name"] = np.repeat(json_list, n_msgs)
+        ch_msgs_df["json_mod_ts"] = np.repeat(json_mod_tss, n_msgs)
 
         # Add a column on the dataframe with the name of the channel:
         ch_msgs_df["channel_folder"] = ch_name
@@ -411,17 +743,10 @@ class Slack:
         "profile_status_text", "profile_status_emoji"
 
         """
-        # Initialize channel_df_usrs as a copy of df_usrs:
-        df = df_usrs.copy()
         # Find the unique set of users in the channel:
         channel_users_list = df_msgs["user"].unique()
-        # Collect the indices of the users that are NOT in the channel:
-        indices_to_drop = [i
-                           for i in range(len(df_usrs))
-                           if df_usrs.at[i, "id"] not in channel_users_list]
-        # Drop the rows on indices_to_drop:
-        df.drop(df.index[indices_to_drop], inplace=True)
-        return df
+        # Keep the rows of the users that are in the channel:
+        return df_usrs[df_usrs["id"].isin(channel_users_list)].copy()
 
     def add_usrs_info_to_msgs_df(self, df_msgs, df_usrs):
         """
@@ -429,7 +754,8 @@ class Slack:
 
         1. Take the user's id (in the format U1234567789) from the df_msgs.
         2. Find the user's name, display name, and bot status from df_usrs.
-        3. Add (in-place) "name", "display_name" and "is_bot" to df_msgs.
+        3. Add (in-place) "name", "display_name", "is_bot" and "deactivated"
+           to df_msgs.
 
         Arguments
         ---------
@@ -440,33 +766,33 @@ class Slack:
             from all the users in the Slack workspace.
 
         """
-        for i in df_msgs.index.values:
-            i_df = df_usrs[df_usrs["id"] == df_msgs.at[i, "user"]]
-            # If users in ch_msgs_df is not in usrs_df:
-            if i_df["display_name"].shape[0] == 0 \
-                    and df_msgs.at[i, "user"] == "USLACKBOT":
-                df_msgs.at[i, "name"] = "USLACKBOT"
-                df_msgs.at[i, "display_name"] = "USLACKBOT"
-                df_msgs.at[i, "is_bot"] = True
-                df_msgs.at[i, "deactivated"] = False
-            elif i_df["display_name"].shape[0] == 0 \
-                    and df_msgs.at[i, "user"] != "USLACKBOT":
-                df_msgs.at[i, "name"] = "(user not found)"
-                df_msgs.at[i, "display_name"] = "(user not found)"
-                df_msgs.at[i, "is_bot"] = "(user not found)"
-                df_msgs.at[i, "deactivated"] = "(user not found)"
-            # If users in ch_msgs_df is in usrs_df:
-            else:
-                df_msgs.at[i, "name"] = i_df["name"].values[0]
-                df_msgs.at[i, "display_name"] = i_df["display_name"].values[0]
-                df_msgs.at[i, "is_bot"] = i_df["is_bot"].values[0]
-                df_msgs.at[i, "deactivated"] = i_df["deleted"].values[0]
-            del i_df
+        # Index the users by their id once, so the information of all the
+        # messages is looked up in a single pass (if an id is repeated in
+        # df_usrs, its first row is used):
+        usrs = df_usrs.drop_duplicates("id").set_index("id")
+
+        # Users in df_msgs that are not in df_usrs:
+        is_found = df_msgs["user"].isin(usrs.index)
+        is_slackbot = ~is_found & (df_msgs["user"] == "USLACKBOT")
+        is_not_found = ~is_found & ~is_slackbot
+
+        for col, usrs_col, slackbot_value in [("name", "name", "USLACKBOT"),
+                                              ("display_name", "display_name",
+                                               "USLACKBOT"),
+                                              ("is_bot", "is_bot", True),
+                                              ("deactivated", "deleted", False)]:
+            values = df_msgs["user"].map(usrs[usrs_col].astype(object))
+            values = values.astype(object).mask(is_slackbot, slackbot_value)
+            df_msgs[col] = values.mask(is_not_found, "(user not found)")
 
     def ts_to_tz(self, df, orig_col_name, new_col_name):
         """
         Rewrites timestamps into dates in a given column of a Pandas dataframe.
 
+        The dates are written as strings (see dates_to_str()), or kept as
+        time-zone aware datetime values if "typed_dates" is True in the
+        settings txt file.
+
         Arguments
         ---------
         df : Pandas dataframe
@@ -477,33 +803,82 @@ class Slack:
             Name to use when renaming the column with the dates.
 
         """
-        # Retrieve the column from the Pandas dataframe:
-        df[orig_col_name] = pd.to_numeric(df[orig_col_name], errors="coerce")
+        # Convert the whole column at once (missing or invalid timestamps
+        # become NaT). Only the valid timestamps are given to to_datetime,
+        # since it can raise a spurious FloatingPointError for float arrays
+        # containing NaN:
+        ts = pd.to_numeric(df[orig_col_name], errors="coerce")
+        valid = ts.notna()
+        dates = pd.Series(pd.NaT, index=ts.index, dtype="datetime64[ns, UTC]")
+        dates[valid] = pd.to_datetime(ts[valid], unit="s", utc=True)
+        dates = dates.dt.tz_convert(self.timezone)
+
+        # Keep the dates as datetime values or format them as strings:
+        if self.typed_dates is True:
+            df[orig_col_name] = dates
+        else:
+            df[orig_col_name] = self.dates_to_str(dates)
 
-        # Store the converted dates into a list:
-        tzs = []
-        for i in range(len(df)):
-            i_is_null = pd.Series(df.at[i, orig_col_name]).isnull().values[0]
-            if i_is_null is True:
-                i_date = self.missing_value
-            else:
-                i_date = pd.to_datetime(
-                    df.at[i, orig_col_name], unit="s"
-                    ).tz_localize("UTC").tz_convert(self.timezone)
-                try:
-                    i_date = datetime.strftime(i_date, "%Y-%m-%d %H:%M:%S")
-                except:
-                    i_date = self.missing_value
-            tzs.append(i_date)
+        # Rename the column that it is now a "date":
+        df.rename(columns={orig_col_name: new_col_name}, inplace=True)
 
-        # First, change the type of the dataframe column:
-        df[[orig_col_name]].astype("datetime64[s]")
+    def dates_to_str(self, dates):
+        """
+        Format a Pandas series of datetime values as strings.
 
-        # Then, fill the column with the new dates in tzs:
-        df[orig_col_name] = tzs
+        The dates are written as DATE_FORMAT and the missing dates as
+        missing_value.
 
-        # Rename the column that it is now a "date":
-        df.rename(columns={orig_col_name: new_col_name}, inplace=True)
+        Arguments
+        ---------
+        dates : Pandas series
+
+        Returns
+        -------
+        Pandas series
+
+        """
+        return dates.dt.strftime(DATE_FORMAT).astype("object").where(
+            dates.notna(), self.missing_value)
+
+    def format_dates(self, df):
+        """
+        Format the datetime values of the date columns in df as strings.
+
+        Used before writing the dataframe when "typed_dates" is True. Columns
+        that are not datetime values are kept. The changes are done in-place.
+
+        Arguments
+        ---------
+        df : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+
+        """
+        for col in DATE_COLUMNS:
+            if col in df.columns and \
+                    isinstance(df[col].dtype, pd.DatetimeTZDtype):
+                df[col] = self.dates_to_str(df[col])
+
+    def parse_dates(self, df):
+        """
+        Turn the date columns in df back into time-zone aware datetime values.
+
+        Steps that rebuild the rows of the dataframe (like
+        checkins.parse_reports()) leave the dates as Python objects, with
+        missing_value in the missing dates. The changes are done in-place.
+
+        Arguments
+        ---------
+        df : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+
+        """
+        for col in DATE_COLUMNS:
+            if col in df.columns and \
+                    not isinstance(df[col].dtype, pd.DatetimeTZDtype):
+                dates = df[col].where(df[col] != self.missing_value)
+                df[col] = pd.to_datetime(dates, utc=True).dt.tz_convert(
+                    self.timezone)
 
     def extract_urls(self, df):
         """
@@ -517,13 +892,10 @@ class Slack:
             Dataframe containing the messages of a Slack channel.
 
         """
-        # Initialize constructor of the class URLExtract():
-        extractor = URLExtract()
-
         # Iterate over all the messages in df:
         for i in range(len(df)):
             # Extract any URLs as list
-            urls = extractor.find_urls(df.at[i, "text"])
+            urls = find_urls(df.at[i, "text"])
             if len(urls) > 0:
                 # Rewrite the list as a string separated by commas:
                 urls_string = ";  ".join(urls)
@@ -531,6 +903,61 @@ class Slack:
             else:
                 df.at[i, "URL(s)"] = self.missing_value
 
+    def get_usrs_names(self, df_usrs):
+        """
+        Return a dictionary with the name to show for each user's id.
+
+        The name is the user's display_name or, if there is no display_name,
+        the user's profile_real_name. Bots are named with their
+        profile_real_name followed by " (bot)". If an id is repeated in
+        df_usrs, its first row is used.
+
+        Arguments
+        ---------
+        df_usrs : Pandas dataframe
+            Dataframe containing the user's information.
+
+        Returns
+        -------
+        Dictionary with the users' ids as keys and their names as values.
+
+        """
+        names = {}
+        for user, name, is_bot, real_name in zip(
+                df_usrs["id"].tolist(), df_usrs["display_name"].tolist(),
+                df_usrs["is_bot"].tolist(),
+                df_usrs["profile_real_name"].tolist()):
+            if user in names:
+                continue
+            if is_bot is True:
+                name = real_name + " (bot)"
+            elif name == self.missing_value:
+                name = real_name
+            names[user] = name
+        return names
+
+    def get_chs_names(self, df_chs):
+        """
+        Return a dictionary with the name of each channel's id.
+
+        Arguments
+        ---------
+        df_chs : Pandas dataframe
+            Output of get_all_channels_info(). If None, the dictionary is
+            empty.
+
+        Returns
+        -------
+        Dictionary with the channels' ids as keys and their names as values.
+
+        """
+        names = {}
+        if df_chs is not None:
+            for ch_id, ch_name in zip(df_chs["id"].tolist(),
+                                      df_chs["name"].tolist()):
+                names.setdefault(ch_id, ch_name)
+        return names
+
     def usr_id_to_name(self, df_msgs, df_usrs):
         """
         Replace user_id with the user's display_name in df_msgs["text"].
@@ -563,30 +990,20 @@ class Slack:
         # Trailhead, Slack Team Emoji Copy, Guru, Guru, Google Calendar, Polly.
         # "USLACKBOT" and "B043CSZ0FL7" are the only bot messages if df_msgs,
         # but they are not in df_usrs!
-        for i in range(len(df_msgs)):
-            text = df_msgs.at[i, "text"]
-            matches = re.findall(r"<+@[A-Za-z0-9]+>", text)
-            if len(matches) > 0:
-                for match in matches:
-                    user = match[2:-1]
-                    if user in df_usrs["id"].values:
-                        name = df_usrs[df_usrs["id"] == user]["display_name"].values[0]
-                        is_bot = df_usrs[df_usrs["id"] == user]["is_bot"].values[0]
-                        if is_bot is True:
-                            name = df_usrs[df_usrs["id"] == user]["profile_real_name"].values[0] + " (bot)"
-                        elif name == self.missing_value:
-                            name = df_usrs[df_usrs["id"] == user]["profile_real_name"].values[0]
-                    else:
-                        name = f"{user} (user not found)"
-                    text = re.sub(f"<@{user}>", f"@{name}@", text)
-                df_msgs.at[i, "text"] = text
+        names = self.get_usrs_names(df_usrs)
+
+        # Rewrite all the mentions of each message in a single pass:
+        df_msgs["text"] = df_msgs["text"].map(
+            lambda text: rewrite_mentions(text, names)
+            if isinstance(text, str) else text)
 
     def parent_id_to_name(self, df_msgs, df_usrs):
         """
         Replace parent_user_id with its display_name in the dataframe.
 
         If there is no display_name, then "parent_user_id" is replaced with
-        "profile_real_name". The replacements are done in-place.
+        "profile_real_name" (see get_usrs_names()). The replacements are done
+        in-place and the column is renamed to "parent_user_name".
 
         Arguments
         ---------
@@ -597,44 +1014,93 @@ class Slack:
             Dataframe contains the user's information.
 
         """
-        for i in range(len(df_msgs)):
-            user = df_msgs.at[i, "parent_user_id"]
-            if user != self.missing_value:
-                name = df_usrs[df_usrs["id"] == user]["display_name"].values
-                if user in df_usrs["id"].values:
-                    is_bot = df_usrs[df_usrs["id"] == user]["is_bot"].values
-                    if is_bot is True:
-                        name = df_usrs[df_usrs["id"] == user]["profile_real_name"].values + " (bot)"
-                    elif name == self.missing_value:
-                        name = df_usrs[df_usrs["id"] == user]["profile_real_name"].values
-                else:
-                    name = user+" (user not found)"
-                df_msgs.at[i, "parent_user_id"] = name
+        names = self.get_usrs_names(df_usrs)
+        users = df_msgs["parent_user_id"]
+
+        # Resolve the whole column at once, keeping the missing values:
+        is_found = users.isin(list(names))
+        parents = users.map(names).where(
+            is_found, users.astype(str) + " (user not found)")
+        df_msgs["parent_user_id"] = parents.where(users != self.missing_value,
+                                                  users)
         df_msgs.rename(
             columns={"parent_user_id": "parent_user_name"}, inplace=True
             )
 
-    def ch_id_to_name(self, df_msgs):
+    def ch_id_to_name(self, df_msgs, df_chs=None):
         """
         Replace the channel_id with the channel's name in df_msgs["text"].
 
-        The replacements are done in-place.
+        The links <#channel_id|channel_name> and <#channel_id> are replaced
+        with #channel_name, taking the name from df_chs. If the channel is not
+        in df_chs, the name in the link is used or, if there is none, the link
+        is kept. The replacements are done in-place.
 
         Arguments
         ---------
         df_msgs : Pandas dataframe
             Dataframe containing the messages of a Slack channel.
+        df_chs : Pandas dataframe (optional. Default is None)
+            Output of get_all_channels_info().
 
         """
-        for i in range(len(df_msgs)):
-            text = df_msgs.at[i, "text"]
-            matches = re.findall(r"#+[A-Za-z0-9]+\|", text)
-            if len(matches) > 0:
-                for match in matches:
-                    # Replace <#channel_id|channel_name> to channel_name
-                    text = re.sub(match, "", text)
-                    text = re.sub(r"<+\|", "<", text)
-                df_msgs.at[i, "text"] = text
+        names = self.get_chs_names(df_chs)
+
+        # Rewrite all the channel links of each message in a single pass:
+        df_msgs["text"] = df_msgs["text"].map(
+            lambda text: rewrite_ch_links(text, names)
+            if isinstance(text, str) else text)
+
+    def normalize_text(self, df_msgs, df_usrs, df_chs=None):
+        """
+        Normalize df_msgs["text"] and extract its features in a single pass.
+
+        The text of each message is read once to replace the mentions of users
+        and the links to channels with their names (as usr_id_to_name() and
+        ch_id_to_name()), extract its URL(s) (as extract_urls()) and identify
+        and remove its emojis (as id_emojis_in_text()). The columns "URL(s)",
+        "contained_emoji" and "mentioned_users" (ids of the mentioned users)
+        are added in-place.
+
+        Arguments
+        ---------
+        df_msgs : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+        df_usrs : Pandas dataframe
+            Dataframe containing the user's information.
+        df_chs : Pandas dataframe (optional. Default is None)
+            Output of get_all_channels_info().
+
+        """
+        usrs_names = self.get_usrs_names(df_usrs)
+        chs_names = self.get_chs_names(df_chs)
+
+        texts, urls_col, emojis_col, mentions_col = [], [], [], []
+        for text in df_msgs["text"].tolist():
+            mentions, urls, contained_emoji = [], [], False
+            if isinstance(text, str):
+                text = rewrite_mentions(text, usrs_names, mentions)
+                text = rewrite_ch_links(text, chs_names)
+                urls = find_urls(text)
+                text, n_emojis = EMOJI_PATTERN.subn("", text)
+                contained_emoji = n_emojis > 0
+            texts.append(text)
+            emojis_col.append(contained_emoji)
+            # Rewrite the lists as strings separated by commas:
+            urls_col.append(";  ".join(urls) if len(urls) > 0
+                            else self.missing_value)
+            mentions = list(dict.fromkeys(mentions))
+            mentions_col.append(";  ".join(mentions) if len(mentions) > 0
+                                else self.missing_value)
+
+        df_msgs["text"] = pd.Series(texts, index=df_msgs.index, dtype="object")
+        df_msgs["URL(s)"] = pd.Series(urls_col, index=df_msgs.index,
+                                      dtype="object")
+        df_msgs["contained_emoji"] = pd.Series(emojis_col, index=df_msgs.index,
+                                               dtype="object")
+        df_msgs["mentioned_users"] = pd.Series(mentions_col,
+                                               index=df_msgs.index,
+                                               dtype="object")
 
     def drop_extra_unparsed_rows(self, df_msgs):
         """
@@ -681,20 +1147,47 @@ class Slack:
         List with the indices of the automatic messages in the dataframe.
 
         """
-        indices = []
-        for i in range(len(df_msgs)):
-            msg_id = df_msgs.at[i, "msg_id"]
-            is_bot = df_msgs.at[i, "is_bot"]
-            if "channel_join" in msg_id or \
-                    "channel_leave" in msg_id or \
-                    "channel_name" in msg_id or \
-                    "channel_canvas_updated" in msg_id or \
-                    "channel_convert_to_public" in msg_id:
-                indices.append(i)
-            if is_bot is True or is_bot == "True":  # review. Not being applied
-                indices.append(i)
-                print("bot message identified")
-        return indices
+        mask = self.automatic_msgs_mask(df_msgs)
+        return list(df_msgs.index[mask])
+
+    def automatic_msgs_mask(self, df_msgs):
+        """
+        Return a boolean series flagging the messages sent automatically.
+
+        The column "is_automatic" added by classify_msgs() is used if present.
+
+        Arguments
+        ---------
+        df_msgs : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+
+        Returns
+        -------
+        Pandas series
+
+        """
+        if "is_automatic" in df_msgs.columns:
+            return df_msgs["is_automatic"].astype(bool)
+        is_action = df_msgs["msg_id"].astype(str).str.contains(
+            AUTOMATIC_MSG_PATTERN)
+        is_bot = df_msgs["is_bot"].isin([True, "True"])
+        return is_action | is_bot
+
+    def classify_msgs(self, df_msgs):
+        """
+        Flag the messages of a channel following filter_rules.
+
+        A boolean column is added in-place for each flag of filter_rules in
+        the settings ("is_automatic" and "is_short" by default, see
+        MsgFilter), so the messages are inspected only once.
+
+        Arguments
+        ---------
+        df_msgs : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+
+        """
+        self.msg_filter.flag_msgs(df_msgs)
 
     def get_automatic_msgs(self, df_msgs):
         """
@@ -710,8 +1203,8 @@ class Slack:
         Pandas dataframe
 
         """
-        # Retrieve rows from indices:
-        df = df_msgs.loc[self.id_automatic_msgs(df_msgs)]
+        # Retrieve the rows of the automatic messages:
+        df = df_msgs[self.automatic_msgs_mask(df_msgs)].copy()
         # Reset the indices:
         clean.reset_indices(df)
         return df
@@ -730,9 +1223,8 @@ class Slack:
         Pandas dataframe
 
         """
-        # Create a copy of the input dataframe and drop the relevant indices:
-        df = df_msgs.copy()
-        df.drop(self.id_automatic_msgs(df_msgs), inplace=True)
+        # Keep a copy of the rows that are not automatic messages:
+        df = df_msgs[~self.automatic_msgs_mask(df_msgs)].copy()
         clean.reset_indices(df)
         return df
 
@@ -752,15 +1244,13 @@ class Slack:
         Pandas dataframe
 
         """
-        pattern = r"(:)([a-z0-9\_\-\+]+)(:)"
-        for i in range(len(df_msgs)):
-            text = df_msgs.at[i, "text"]
-            match = re.search(pattern, text)
-            if match is None:
-                df_msgs.at[i, "contained_emoji"] = False
-            else:
-                df_msgs.at[i, "contained_emoji"] = True
-                df_msgs.at[i, "text"] = re.sub(pattern, "", text)
+        has_emoji = df_msgs["text"].map(
+            lambda text: isinstance(text, str)
+            and EMOJI_PATTERN.search(text) is not None).astype(bool)
+        df_msgs["contained_emoji"] = has_emoji.astype("object")
+        df_msgs.loc[has_emoji, "text"] = \
+            df_msgs.loc[has_emoji, "text"].str.replace(EMOJI_PATTERN, "",
+                                                       regex=True)
         return df_msgs
 
     def remove_emojis_in_text(self, df_msgs):
@@ -777,10 +1267,10 @@ class Slack:
         Pandas dataframe
 
         """
-        pattern = r"(:)([a-z0-9\_\-\+]+)(:)"
-        for i in range(len(df_msgs)):
-            if df_msgs.at[i, "contained_emoji"] is True:
-                df_msgs.at[i, "text"] = re.sub(pattern, "", df_msgs.at[i, "text"])
+        has_emoji = df_msgs["contained_emoji"].isin([True])
+        df_msgs.loc[has_emoji, "text"] = \
+            df_msgs.loc[has_emoji, "text"].str.replace(EMOJI_PATTERN, "",
+                                                       regex=True)
         return df_msgs
 
     def id_short_msgs(self, df_msgs, n_char):
@@ -800,12 +1290,27 @@ class Slack:
         List with the indices of the short messages in the dataframe.
 
         """
-        indices = []
-        for i in range(len(df_msgs)):
-            text = df_msgs.at[i, "text"]
-            if len(text) <= n_char:
-                indices.append(i)
-        return indices
+        mask = self.short_msgs_mask(df_msgs, n_char)
+        return list(df_msgs.index[mask])
+
+    def short_msgs_mask(self, df_msgs, n_char):
+        """
+        Return a boolean series flagging the msgs with at most n_char characters.
+
+        Arguments
+        ---------
+        df_msgs : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+        n_char : int
+            Minimum number of characters needed for a message not to be
+            dropped.
+
+        Returns
+        -------
+        Pandas series
+
+        """
+        return df_msgs["text"].str.len() <= n_char
 
     def get_short_msgs(self, df_msgs, n_char):
         """
@@ -824,7 +1329,7 @@ class Slack:
         Pandas dataframe
 
         """
-        df = df_msgs.loc[self.id_short_msgs(df_msgs, n_char)]
+        df = df_msgs[self.short_msgs_mask(df_msgs, n_char)].copy()
         clean.reset_indices(df)
         return df
 
@@ -845,12 +1350,47 @@ class Slack:
         Pandas dataframe
 
         """
-        indices2drop = self.id_short_msgs(df_msgs, n_char)
-        df = df_msgs.copy()
-        df.drop(indices2drop, inplace=True)
+        df = df_msgs[~self.short_msgs_mask(df_msgs, n_char)].copy()
         clean.reset_indices(df)
         return df
 
+    def partition_msgs(self, df_msgs, columns):
+        """
+        Sort the messages by date and flag the filtered-out ones in one pass.
+
+        The rows are sorted by "msg_date" and the columns selected in a single
+        copy of df_msgs. The "Relevant messages" and "Filtered-out messages"
+        are then selected from it with the returned mask, so each message is
+        kept only once even if it meets several of the filter_rules.
+
+        Arguments
+        ---------
+        df_msgs : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+        columns : list
+            Names of the columns to keep, in order.
+
+        Returns
+        -------
+        df : Pandas dataframe
+            All the messages sorted by "msg_date", with the given columns.
+        filtered_out : Pandas series
+            Boolean series flagging the messages of df that meet any of the
+            filter_rules.
+
+        """
+        if any(flag not in df_msgs.columns for flag in self.msg_filter.flags):
+            self.classify_msgs(df_msgs)
+        # Stable sort, so the messages with the same date keep their
+        # original order in the three sheets.
+        clean.reset_indices(df_msgs)
+        order = df_msgs["msg_date"].sort_values(kind="stable").index
+        df = df_msgs.loc[order, columns]
+        filtered_out = self.msg_filter.filtered_out_mask(df_msgs)[order]
+        clean.reset_indices(df)
+        clean.reset_indices(filtered_out)
+        return df, filtered_out
+
     def add_channel_info(self, channel_path, channel_df):
         """
         Add "channel", "export_dates" and "parsed_reports_in_channel" to df.
@@ -987,6 +1527,8 @@ class Slack:
         """
         Select a message's URLs as specified in the settings txt file.
 
+        A URL is selected if it contains any of the strings in "urls_to_show".
+
         Arguments
         ---------
         url_list : list
@@ -999,19 +1541,22 @@ class Slack:
         List URL(s) from a Slack message as specified in the settings txt file.
 
         """
-        out = []
-        for url in url_list:
+        pattern = compile_urls_pattern(tuple(settings.get("urls_to_show")))
+        if pattern is None:
+            return []
 
-            for url_exp in settings.get('urls_to_show'):
-                if url_exp in url:
-                    out.append(url.lstrip(' ').rstrip(' '))
-
-        return out
+        # Keep each matching URL only once:
+        out = [url.strip(" ") for url in url_list if pattern.search(url)]
+        return list(dict.fromkeys(out))
 
     def select_desired_urls(self, df, settings):
         """
         Filter-out unwanted URL(s) as specified in the settings txt file.
 
+        The URL(s) of each message are matched at once against all the
+        strings in "urls_to_show" (see filter_urls()), and the messages
+        without any selected URL are dropped.
+
         Arguments
         ---------
         df : Pandas dataframe
@@ -1024,24 +1569,419 @@ class Slack:
         Pandas dataframe
 
         """
-        indices2drop = []
-        for i in range(len(df)):
+        pattern = compile_urls_pattern(tuple(settings.get("urls_to_show")))
+        if pattern is None:
+            return df.iloc[0:0]
+
+        # Split the URL(s) of the messages into one row per URL and keep the
+        # ones containing any of the strings in "urls_to_show":
+        urls = df["URL(s)"].astype(str).str.split("; ").explode().str.strip(" ")
+        urls = urls[urls.str.contains(pattern)]
+
+        # Join the selected URL(s) of each message, keeping each URL once, and
+        # drop the messages without any:
+        urls = urls.groupby(level=0, sort=False).agg(
+            lambda msg_urls: "; ".join(dict.fromkeys(msg_urls)))
+        df = df.loc[df.index.isin(urls.index)].copy()
+        df["URL(s)"] = urls
+        return df
 
-            urls = df.at[i, "URL(s)"].split("; ")
-            filtered_urls = self.filter_urls(urls, settings)
-            if filtered_urls == []:
-                indices2drop.append(i)
-            else:
-                df.at[i, "URL(s)"] = '; '.join(filtered_urls)
 
-        indices2drop = list(set(indices2drop))
-        return df.drop(indices2drop, axis=0, inplace=False)
+class ChannelCache:
+    """
+    Cache on disk of the channels' messages with the users' information.
+
+    Each channel's dataframe is stored as a pickle file named after the
+    fingerprint of its inputs (see Slack.get_ch_fingerprint), so the JSON
+    files of a channel are not decoded again while they do not change. When
+    the size of the cache exceeds max_size_mb, the least recently used files
+    are deleted.
+
+    Attributes
+    ----------
+    cache_path : str
+        Directory where the cached dataframes are stored. The cache is
+        disabled if it is None or "".
+
+    max_size_mb : float
+        Maximum size of the cache in megabytes.
+
+    Methods
+    -------
+    get(key)
+        Return the cached dataframe for the given key, or None.
+
+    put(key, df)
+        Store a dataframe in the cache and evict the oldest entries.
+
+    evict()
+        Delete the least recently used files until the cache fits its size.
+
+    """
+
+    def __init__(self, cache_path, max_size_mb):
+        self.cache_path = cache_path
+        self.max_size_mb = max_size_mb
+        if self.max_size_mb is None:
+            self.max_size_mb = 500
+        self.enabled = cache_path is not None and cache_path != ""
+        if self.enabled is True:
+            os.makedirs(self.cache_path, exist_ok=True)
+
+    def get(self, key):
+        """
+        Return the cached dataframe for the given key, or None.
+
+        Arguments
+        ---------
+        key : str
+            Fingerprint of the channel's inputs.
+
+        Returns
+        -------
+        Pandas dataframe or None if the key is not in the cache.
+
+        """
+        if self.enabled is False:
+            return None
+        path = f"{self.cache_path}/{key}.pkl"
+        try:
+            df = pd.read_pickle(path)
+            # Mark the file as recently used:
+            os.utime(path)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            df = None
+        return df
+
+    def put(self, key, df):
+        """
+        Store a dataframe in the cache and evict the oldest entries.
+
+        Arguments
+        ---------
+        key : str
+            Fingerprint of the channel's inputs.
+        df : Pandas dataframe
+
+        """
+        if self.enabled is False:
+            return
+        path = f"{self.cache_path}/{key}.pkl"
+        # Write to a temporary file first, so other processes never read a
+        # file that is only partially written:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used files until the cache fits its size.
+        """
+        entries = []
+        with os.scandir(self.cache_path) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size = sum(entry[1] for entry in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_mb * 1024 * 1024:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+class MsgFilter:
+    """
+    Flag the messages to filter out following the rules of the settings.
+
+    Each rule names a flag (added to the messages as a boolean column) and
+    lists its conditions, written as ["column", "condition", value] like the
+    triggers of the highlights in the Excel files. A flag is True for the
+    messages that meet any of its conditions, and a message is filtered out
+    when any of the flags is True. The conditions are checked beforehand and
+    evaluated on whole columns, once per channel.
+
+    Attributes
+    ----------
+    rules : dict
+        Conditions of each flag, {"flag": [["column", "condition", value]]}.
+        FILTER_RULES is used if it is None.
+
+    flags : list
+        Names of the flags, in the order of the rules.
+
+    valid_columns : list
+        Columns of the messages that can be used in the conditions. They are
+        not checked if it is None.
+
+    settings_file : str
+        Name of the settings txt file with the rules, used in the error
+        messages ("the settings file" if it is None).
+
+    columns : list
+        Columns of the messages used by the conditions.
+
+    Methods
+    -------
+    check_rules()
+        Check the format of the rules and stop if any of them is not valid.
+
+    compile_condition(column, condition, value)
+        Return a function evaluating a condition on a dataframe of messages.
+
+    flag_msgs(df_msgs)
+        Add a boolean column for each flag to the dataframe of messages.
+
+    filtered_out_mask(df_msgs)
+        Return a boolean series flagging the messages to filter out.
+
+    """
+
+    def __init__(self, rules=None, valid_columns=None, settings_file=None):
+        self.rules = rules
+        if self.rules is None:
+            self.rules = FILTER_RULES
+        self.valid_columns = valid_columns
+        self.settings_file = settings_file
+        self.check_rules()
+        self.flags = list(self.rules.keys())
+        self.columns = []
+        self.compiled_rules = {}
+        for flag, conditions in self.rules.items():
+            self.compiled_rules[flag] = []
+            for column, condition, value in conditions:
+                self.compiled_rules[flag].append(
+                    self.compile_condition(column, condition, value))
+                if column not in self.columns:
+                    self.columns.append(column)
+
+    def check_rules(self):
+        """
+        Check the format of the rules and stop if any of them is not valid.
+
+        Each condition must be a list ["column", "condition", value], with
+        condition in FILTER_CONDITIONS, column in valid_columns (if given)
+        and a value of the type expected by the condition.
+        """
+        error = None
+        if not isinstance(self.rules, dict):
+            error = "filter_rules must be a dictionary"
+        else:
+            for flag, conditions in self.rules.items():
+                if not isinstance(conditions, (list, tuple)):
+                    error = f'The conditions of "{flag}" must be a list'
+                    break
+                for cond in conditions:
+                    error = check_filter_condition(cond, self.valid_columns)
+                    if error is not None:
+                        error = f'In "{flag}": {error}'
+                        break
+                if error is not None:
+                    break
+        if error is not None:
+            where = "the settings file"
+            if self.settings_file is not None:
+                where = f'the file "{self.settings_file}"'
+            print(f"ERROR: {error}." + "\n"
+                  + "       Please review your input for the variable"
+                  + f' "filter_rules" in {where}.')
+            sys.exit()
+
+    def compile_condition(self, column, condition, value):
+        """
+        Return a function evaluating a condition on a dataframe of messages.
+
+        The regular expressions and the lists of values are built here, so
+        they are not built again for every channel. Missing or invalid values
+        never meet a condition (except for "!=" and "not in").
+
+        Arguments
+        ---------
+        column : str
+            Name of the column of the messages.
+        condition : str
+            One of FILTER_CONDITIONS.
+        value
+            Value to compare the column with.
+
+        Returns
+        -------
+        Function of a dataframe returning a boolean Pandas series.
+
+        """
+        if condition in ["==", "!="]:
+            # The booleans may have been read as strings ("True"/"False"):
+            values = [value, str(value)] if isinstance(value, bool) else [value]
+            if condition == "==":
+                return lambda df: df[column].isin(values)
+            return lambda df: ~df[column].isin(values)
+        if condition in ["in", "not in"]:
+            values = list(value)
+            if condition == "in":
+                return lambda df: df[column].isin(values)
+            return lambda df: ~df[column].isin(values)
+        if condition == "contains":
+            pattern = re.compile(value)
+            return lambda df: df[column].astype(str).str.contains(pattern,
+                                                                  na=False)
+        if condition.startswith("len"):
+            compare = FILTER_COMPARISONS[condition[3:]]
+            return lambda df: compare(df[column].str.len(), value).fillna(False)
+        compare = FILTER_COMPARISONS[condition]
+        return lambda df: compare(pd.to_numeric(df[column], errors="coerce"),
+                                  value)
+
+    def flag_msgs(self, df_msgs):
+        """
+        Add a boolean column for each flag to the dataframe of messages.
+
+        The columns are checked by check_rules() when the rules are read. If
+        the dataframe lacks any of them anyway, a ValueError is raised (and
+        not sys.exit(), which would leave a pool of processes waiting for
+        the worker).
+
+        Arguments
+        ---------
+        df_msgs : Pandas dataframe
+            Dataframe containing the messages of a Slack channel.
+
+        """
+        missing = [col for col in self.columns if col not in df_msgs.columns]
+        if len(missing) > 0:
+            raise ValueError(f"The columns {missing} used in filter_rules "
+                             + "were not found in the messages.")
+        for flag, conditions in self.compiled_rules.items():
+            mask = np.zeros(len(df_msgs), dtype=bool)
+            for condition in conditions:
+                mask |= condition(df_msgs).to_numpy(dtype=bool)
+            df_msgs[flag] = mask
+
+    def filtered_out_mask(self, df_msgs):
+        """
+        Return a boolean series flagging the messages to filter out.
+
+        Arguments
+        ---------
+        df_msgs : Pandas dataframe
+            Dataframe with the columns added by flag_msgs().
+
+        Returns
+        -------
+        Pandas series
+
+        """
+        mask = pd.Series(False, index=df_msgs.index)
+        for flag in self.flags:
+            mask |= df_msgs[flag].astype(bool)
+        return mask
+
+
+class OfflineURLExtract(URLExtract):
+    """
+    URLExtract that reads the top-level domains only from a local file.
+
+    URLExtract looks for its list of top-level domains (TLDs) in a cache
+    directory, locks it while reading it, and can download a newer list from
+    IANA. This class instead reads the list from tlds_path without locking or
+    writing any file, and never downloads it, so the extractor can be built
+    on hosts without network access or with read-only directories.
+
+    Attributes
+    ----------
+    tlds_path : str
+        Path to the list of TLDs (in the format of IANA's
+        tlds-alpha-by-domain.txt).
+
+    Methods
+    -------
+    update()
+        Do not download the list of TLDs (returns False).
+
+    update_when_older(days)
+        Do not download the list of TLDs (returns False).
+
+    """
+
+    def __init__(self, tlds_path, **kwargs):
+        self.tlds_path = tlds_path
+        super().__init__(**kwargs)
+
+    def _get_cache_file_path(self):
+        return self.tlds_path
+
+    def _load_cached_tlds(self):
+        tlds = set()
+        with open(self.tlds_path, "r", encoding="utf-8") as f:
+            for line in f:
+                tld = line.strip().lower()
+                # Skip empty lines and comments:
+                if tld == "" or tld.startswith("#"):
+                    continue
+                tlds.add("." + tld)
+                tlds.add("." + idna.decode(tld))
+        return tlds
+
+    def update(self):
+        """Do not download the list of TLDs (returns False)."""
+        return False
+
+    def update_when_older(self, days):
+        """Do not download the list of TLDs (returns False)."""
+        return False
 
 
 # #############################################################################
 # FUNCTIONS
 # #########
 
+
+def check_filter_condition(cond, valid_columns=None):
+    """
+    Return the error found in a condition of filter_rules, or None.
+
+    Arguments
+    ---------
+    cond : list
+        Condition written as ["column", "condition", value].
+    valid_columns : list (optional. Default value is None)
+        Columns that can be used in the condition (not checked if None).
+
+    Returns
+    -------
+    str or None
+
+    """
+    if not isinstance(cond, (list, tuple)) or len(cond) != 3:
+        return f'The condition {cond} must be ["column", "condition", value]'
+    column, condition, value = cond
+    if valid_columns is not None and column not in valid_columns:
+        return (f'Unknown column "{column}" in {cond}. Use one of: '
+                + ", ".join(valid_columns))
+    if condition not in FILTER_CONDITIONS:
+        return (f'Unknown condition "{condition}" in {cond}. Use one of: '
+                + ", ".join(FILTER_CONDITIONS))
+    if condition in ["in", "not in"] \
+            and not isinstance(value, (list, tuple, set)):
+        return f'The value of {cond} must be a list'
+    if condition == "contains":
+        try:
+            re.compile(value)
+        except (re.error, TypeError):
+            return f'The value of {cond} must be a regular expression'
+    if condition in FILTER_COMPARISONS or condition.startswith("len"):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return f'The value of {cond} must be a number'
+    return None
+
+
 def write_info_to_file(flag, df, filename, path):
     """
     Write a given dataframe to an Excel file.
@@ -1061,3 +2001,361 @@ def write_info_to_file(flag, df, filename, path):
     if flag is True:
         df.to_excel(f"{path}/{filename}{'.xlsx'}", index=False)
         print(datetime.now().time(), f"Wrote file {filename}.xlsx")
+
+
+def decode_json(f):
+    """
+    Decode the content of a JSON file with the available JSON backend.
+
+    The backend (orjson or Python's json module) is given by JSON_BACKEND.
+
+    Arguments
+    ---------
+    f : file object
+        File opened for binary reading.
+
+    Returns
+    -------
+    Python object (list or dict) with the content of the JSON file.
+
+    """
+    if orjson is not None:
+        return orjson.loads(f.read())
+    return json.loads(f.read())
+
+
+def hash_file(file_path):
+    """
+    Return the SHA-1 hash of the content of a file.
+
+    Arguments
+    ---------
+    file_path : str
+        Path to the file.
+
+    Returns
+    -------
+    str with the hexadecimal hash.
+
+    """
+    with sparser.open_file(file_path) as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def read_manifest(path):
+    """
+    Read the manifest of a previous run from the destination directory.
+
+    Arguments
+    ---------
+    path : str
+        The absolute path to the destination directory.
+
+    Returns
+    -------
+    Dictionary with keys "workspace" and "channels". Both are empty if
+    there is no (valid) manifest in the destination directory.
+
+    """
+    manifest = {"workspace": {}, "channels": {}}
+    try:
+        with open(f"{path}/{MANIFEST_NAME}", encoding="utf-8") as f:
+            manifest.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return manifest
+
+
+def write_manifest(manifest, path):
+    """
+    Write the manifest of the current run into the destination directory.
+
+    Arguments
+    ---------
+    manifest : dict
+        Dictionary with keys "workspace" and "channels".
+    path : str
+        The absolute path to the destination directory.
+
+    """
+    with open(f"{path}/{MANIFEST_NAME}", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+
+
+def write_workspace_to_sqlite(db_path, chs_df, usrs_df):
+    """
+    Write the channels and users tables of the SQLite database.
+
+    The tables "channels" and "users" are replaced if they already exist.
+
+    Arguments
+    ---------
+    db_path : str
+        The absolute path to the SQLite database.
+    chs_df : Pandas dataframe
+        Output of Slack.get_all_channels_info().
+    usrs_df : Pandas dataframe
+        Output of Slack.get_all_users_info().
+
+    """
+    with sqlite3.connect(db_path, timeout=60) as con:
+        chs_df.to_sql("channels", con, if_exists="replace", index=False)
+        usrs_df.to_sql("users", con, if_exists="replace", index=False)
+    con.close()
+
+
+def write_msgs_to_sqlite(db_path, ch_name, ch_file, df):
+    """
+    Write the messages of a channel into the SQLite database.
+
+    The rows of the channel already in the table "messages" are replaced.
+    Everything is written in a single transaction, inserting the rows in
+    batches of SQLITE_CHUNKSIZE. The columns of the table are created without
+    a type, so SQLite keeps the type of each value (the columns of the
+    dataframe can mix numbers and the missing_value string). If the columns
+    of the table differ from the ones of the dataframe, the table is created
+    again in the same transaction (BEGIN IMMEDIATE), so processes writing
+    other channels at the same time never drop each other's rows.
+
+    Arguments
+    ---------
+    db_path : str
+        The absolute path to the SQLite database.
+    ch_name : str
+        Name of the Slack channel.
+    ch_file : str
+        Name of the channel's Excel file.
+    df : Pandas dataframe
+        Dataframe with all the messages of the channel. The column "relevant"
+        indicates which ones are in the sheet "Relevant messages".
+
+    """
+    df = df.copy()
+    df.insert(0, "channel_file", ch_file)
+    df.insert(0, "channel", ch_name)
+
+    # The transactions are opened explicitly (isolation_level=None), since
+    # the sqlite3 module does not open them before CREATE or DROP:
+    con = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    try:
+        # Take the write lock before reading the columns of the table, so the
+        # processes writing other channels wait for this transaction instead
+        # of dropping the table after this channel's rows were inserted:
+        con.execute("BEGIN IMMEDIATE")
+        table_cols = [row[1] for row in
+                      con.execute("PRAGMA table_info(messages)").fetchall()]
+        if table_cols != list(df.columns):
+            con.execute("DROP TABLE IF EXISTS messages")
+            cols = ", ".join(f'"{col}"' for col in df.columns)
+            con.execute(f"CREATE TABLE messages ({cols})")
+        else:
+            con.execute("DELETE FROM messages WHERE channel = ?", (ch_name,))
+        df.to_sql("messages", con, if_exists="append", index=False,
+                  chunksize=SQLITE_CHUNKSIZE)
+        if con.in_transaction:
+            con.execute("COMMIT")
+        for col in [col for col in SQLITE_INDICES if col in df.columns]:
+            con.execute(f'CREATE INDEX IF NOT EXISTS "idx_messages_{col}" '
+                        + f'ON messages ("{col}")')
+    except Exception:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+
+
+def read_msgs_from_sqlite(db_path):
+    """
+    Read the relevant messages of each channel from the SQLite database.
+
+    Arguments
+    ---------
+    db_path : str
+        The absolute path to the SQLite database.
+
+    Returns
+    -------
+    Dictionary with the names of the channels' Excel files as keys and
+    dataframes with the channels' relevant messages as values (the same
+    as the sheet "Relevant messages" of the Excel files).
+
+    """
+    with sqlite3.connect(db_path, timeout=60) as con:
+        df = pd.read_sql("SELECT * FROM messages WHERE relevant = 1", con)
+    con.close()
+
+    # Recover the True/False values stored as 1/0:
+    for col in SQLITE_BOOL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].map(lambda value: {1: True, 0: False}.get(value,
+                                                                         value))
+
+    chs_dfs = {}
+    for ch_file, ch_df in df.groupby("channel_file", sort=False):
+        ch_df = ch_df.drop(columns=["channel", "channel_file", "relevant"])
+        chs_dfs[ch_file] = clean.reset_indices(ch_df)
+    return chs_dfs
+
+
+def rewrite_mentions(text, usrs_names, mentions=None):
+    """
+    Replace the mentions of users in a text with their names.
+
+    Each <@user_id> is replaced with @user_name@, or with
+    @user_id (user not found)@ if the user is not in usrs_names.
+
+    Arguments
+    ---------
+    text : str
+        Text of a Slack message.
+    usrs_names : dict
+        Output of Slack.get_usrs_names().
+    mentions : list (optional. Default is None)
+        If given, the ids of the mentioned users are appended to it.
+
+    Returns
+    -------
+    str
+
+    """
+    if "<@" not in text:
+        return text
+
+    def replace_mention(match):
+        user = match.group(1)
+        if mentions is not None:
+            mentions.append(user)
+        return f"@{usrs_names.get(user, f'{user} (user not found)')}@"
+
+    return MENTION_PATTERN.sub(replace_mention, text)
+
+
+def rewrite_ch_links(text, chs_names):
+    """
+    Replace the links to channels in a text with their names.
+
+    Each <#channel_id|channel_name> or <#channel_id> is replaced with
+    #channel_name, taking the name from chs_names. If the channel is not in
+    chs_names, the name in the link is used or, if there is none, the link is
+    kept.
+
+    Arguments
+    ---------
+    text : str
+        Text of a Slack message.
+    chs_names : dict
+        Output of Slack.get_chs_names().
+
+    Returns
+    -------
+    str
+
+    """
+    if "<#" not in text:
+        return text
+
+    def replace_link(match):
+        name = chs_names.get(match.group(1), match.group(2))
+        if name is None or name == "":
+            return match.group(0)
+        return f"#{name}"
+
+    return CHANNEL_LINK_PATTERN.sub(replace_link, text)
+
+
+@lru_cache(maxsize=None)
+def compile_urls_pattern(urls_to_show):
+    """
+    Return a compiled pattern matching any of the given strings.
+
+    Arguments
+    ---------
+    urls_to_show : tuple
+        Strings to look for in the URLs (e.g., "docs.google.com").
+
+    Returns
+    -------
+    Compiled regular expression, or None if urls_to_show is empty.
+
+    """
+    if len(urls_to_show) == 0:
+        return None
+    return re.compile("|".join(re.escape(url) for url in urls_to_show))
+
+
+def get_url_extractor():
+    """
+    Return the instance of URLExtract shared by all the channels.
+
+    The instance is created the first time it is needed in each process (or
+    inherited from the parent process when the workers are forked), so the
+    list of top-level domains is read and compiled only once. The list is
+    read from TLDS_SNAPSHOT_PATH or, if it is missing, from the copy shipped
+    with urlextract, and it is never downloaded (see OfflineURLExtract).
+
+    Returns
+    -------
+    OfflineURLExtract
+
+    """
+    global URL_EXTRACTOR
+    if URL_EXTRACTOR is None:
+        tlds_path = TLDS_SNAPSHOT_PATH
+        if not os.path.exists(tlds_path):
+            tlds_path = TLDS_PACKAGE_PATH
+        URL_EXTRACTOR = OfflineURLExtract(tlds_path)
+    return URL_EXTRACTOR
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def find_urls(text):
+    """
+    Return the URLs found in the text of a message.
+
+    The links written by Slack (<https://url|label>) are read directly and
+    their labels are skipped. The rest of the text is searched with URLExtract
+    only if it can contain a URL (see URL_HINT_PATTERN). The URLs are returned
+    in the order they appear in the text, and the results are remembered for
+    the last URL_CACHE_SIZE texts, since the same text is often posted many
+    times (e.g., by bots).
+
+    Arguments
+    ---------
+    text : str
+        Text of a Slack message.
+
+    Returns
+    -------
+    tuple
+        The URLs found in the text.
+
+    """
+    urls = []
+    start = 0
+    for match in URL_LINK_PATTERN.finditer(text):
+        urls += find_bare_urls(text[start:match.start()])
+        # Slack escapes "&", "<" and ">" in the text of the messages:
+        urls.append(match.group(1).replace("&lt;", "<").replace(
+            "&gt;", ">").replace("&amp;", "&"))
+        start = match.end()
+    urls += find_bare_urls(text[start:])
+    return tuple(urls)
+
+
+def find_bare_urls(text):
+    """
+    Return the URLs found by URLExtract in a text without Slack links.
+
+    Arguments
+    ---------
+    text : str
+
+    Returns
+    -------
+    list
+
+    """
+    if URL_HINT_PATTERN.search(text) is None:
+        return []
+    return get_url_extractor().find_urls(text)
@@ -10,6 +10,10 @@ Classes
 -------
 Parser(txt_path)
 
+ZipExport(zip_path)
+
+DirExport(source_path)
+
 Functions
 ---------
 set_flag_analyze_all_chs(chosen_channel_name)
@@ -30,18 +34,46 @@ list_dirs_in_path(source_path)
 check_ch(file_name, source_path)
     Check if file_name is indeed an expected Slack channel.
 
-make_dest_path(path)
+make_dest_path(path, replace=True)
     Create the path where all the files will be saved.
+
+index_export(source_path)
+    Walk the source directory once and serve later lookups from memory.
+
+get_export_member(path)
+    Split a path into the indexed Slack export and the member inside of it.
+
+path_exists(path)
+    Check if a path exists, either in a directory or in a zipped export.
+
+list_dir(path)
+    List the names of the entries in a directory or in a zipped export.
+
+open_file(path)
+    Open a file for binary reading, either from a directory or a zip file.
+
+get_size_mtime(path)
+    Return the size and modification time of a file.
 """
 
 # Import standard Python libraries:
 import os
 import sys
+import time
+import zipfile
 from pathlib import Path
 import shutil
 import argparse
 
 
+# Indices of the zipped Slack exports already opened by the current process
+# (see get_export_member):
+ZIP_EXPORTS = {}
+
+# Indices of the source directories built with index_export:
+DIR_EXPORTS = {}
+
+
 class Parser:
     """
     Parse the validity of the information provided by a user in a txt file.
@@ -93,8 +125,9 @@ class Parser:
         # evaluation as values:
         self.var_dict = self.evaluate_variables(self.var_defs)
 
-        # List the name of all the variables defined in txt_path:
-        self.var_names = self.var_dict.keys()
+        # List the name of all the variables defined in txt_path (as a list,
+        # so the parsed file can be sent to other processes):
+        self.var_names = list(self.var_dict.keys())
 
 
     def vars_def_in_one_line(self):
@@ -218,6 +251,258 @@ class Parser:
         return out
 
 
+class ZipExport:
+    """
+    Index of the files in a Slack export that was not unzipped.
+
+    The central directory of the zip file is read only once. The channels'
+    directories and JSON files are listed from it, and each file is read from
+    the archive only when it is needed. If all the files of the archive are
+    in one folder, that folder is taken as the source directory.
+
+    Attributes
+    ----------
+    zip_path : str
+        Path to the zip file.
+
+    Methods
+    -------
+    exists(member)
+        Check if a file or directory exists in the zip file.
+
+    listdir(member)
+        List the names of the entries in a directory of the zip file.
+
+    open(member)
+        Open a file of the zip file for binary reading.
+
+    get_size_mtime(member)
+        Return the size and modification time of a file in the zip file.
+    """
+
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self.zip_file = zipfile.ZipFile(zip_path)
+
+        # Find the folder containing all the files, if any:
+        names = [info.filename for info in self.zip_file.infolist()]
+        tops = {name.split("/")[0] for name in names}
+        self.root = ""
+        if len(tops) == 1 and all("/" in name for name in names):
+            self.root = tops.pop() + "/"
+
+        # Index the files and the content of each directory (the names in
+        # each directory are the keys of a dictionary, to keep their order):
+        self.files = {}
+        self.dirs = {"": {}}
+        for info in self.zip_file.infolist():
+            member = info.filename[len(self.root):].rstrip("/")
+            if member == "":
+                continue
+            if info.is_dir() is False:
+                self.files[member] = info
+            # Add the member and its parent directories to self.dirs:
+            while member != "":
+                parent, _, name = member.rpartition("/")
+                if member not in self.dirs and member not in self.files:
+                    self.dirs[member] = {}
+                self.dirs.setdefault(parent, {})[name] = None
+                member = parent
+
+    def exists(self, member):
+        """
+        Check if a file or directory exists in the zip file.
+
+        Arguments
+        ---------
+        member : str
+            Path inside the zip file, relative to the source directory.
+
+        Returns
+        -------
+        Boolean
+
+        """
+        return member in self.files or member in self.dirs
+
+    def listdir(self, member):
+        """
+        List the names of the entries in a directory of the zip file.
+
+        Arguments
+        ---------
+        member : str
+            Path inside the zip file, relative to the source directory.
+
+        Returns
+        -------
+        List with the names of the files and directories.
+
+        """
+        if member not in self.dirs:
+            raise FileNotFoundError(f"{self.zip_path}/{member}")
+        return list(self.dirs[member])
+
+    def open(self, member):
+        """
+        Open a file of the zip file for binary reading.
+
+        Arguments
+        ---------
+        member : str
+            Path inside the zip file, relative to the source directory.
+
+        Returns
+        -------
+        File object.
+
+        """
+        return self.zip_file.open(self.files[member])
+
+    def get_size_mtime(self, member):
+        """
+        Return the size and modification time of a file in the zip file.
+
+        Arguments
+        ---------
+        member : str
+            Path inside the zip file, relative to the source directory.
+
+        Returns
+        -------
+        size : int
+            Size of the uncompressed file in bytes.
+
+        mtime : float
+            Timestamp of the last modification of the file.
+
+        """
+        info = self.files[member]
+        return info.file_size, time.mktime(info.date_time + (0, 0, -1))
+
+
+class DirExport:
+    """
+    Index of the files in the source directory of a Slack export.
+
+    The source directory is walked only once with os.scandir. The names of
+    the channels' directories and files are kept in memory, together with
+    their directory entries, which also provide their size and modification
+    time (without an extra request to the file system on Windows, and with
+    at most one request per file otherwise). It has the same methods as
+    ZipExport.
+
+    Attributes
+    ----------
+    source_path : str
+        Path to the source directory.
+
+    Methods
+    -------
+    exists(member)
+        Check if a file or directory exists in the source directory.
+
+    listdir(member)
+        List the names of the entries in a directory.
+
+    open(member)
+        Open a file for binary reading.
+
+    get_size_mtime(member)
+        Return the size and modification time of a file.
+    """
+
+    def __init__(self, source_path):
+        self.source_path = source_path
+
+        # Index the files and the content of each directory:
+        self.files = {}
+        self.dirs = {}
+        dirs_to_scan = [("", source_path)]
+        while len(dirs_to_scan) > 0:
+            member, path = dirs_to_scan.pop()
+            self.dirs[member] = {}
+            with os.scandir(path) as it:
+                for entry in it:
+                    self.dirs[member][entry.name] = None
+                    entry_member = f"{member}/{entry.name}".lstrip("/")
+                    if entry.is_dir():
+                        dirs_to_scan.append((entry_member, entry.path))
+                    else:
+                        self.files[entry_member] = entry
+
+    def exists(self, member):
+        """
+        Check if a file or directory exists in the source directory.
+
+        Arguments
+        ---------
+        member : str
+            Path relative to the source directory.
+
+        Returns
+        -------
+        Boolean
+
+        """
+        return member in self.files or member in self.dirs
+
+    def listdir(self, member):
+        """
+        List the names of the entries in a directory.
+
+        Arguments
+        ---------
+        member : str
+            Path relative to the source directory.
+
+        Returns
+        -------
+        List with the names of the files and directories.
+
+        """
+        if member not in self.dirs:
+            raise FileNotFoundError(f"{self.source_path}/{member}")
+        return list(self.dirs[member])
+
+    def open(self, member):
+        """
+        Open a file for binary reading.
+
+        Arguments
+        ---------
+        member : str
+            Path relative to the source directory.
+
+        Returns
+        -------
+        File object.
+
+        """
+        return open(self.files[member].path, "rb")
+
+    def get_size_mtime(self, member):
+        """
+        Return the size and modification time of a file.
+
+        Arguments
+        ---------
+        member : str
+            Path relative to the source directory.
+
+        Returns
+        -------
+        size : int
+            Size of the file in bytes.
+
+        mtime : float
+            Timestamp of the last modification of the file.
+
+        """
+        stat = self.files[member].stat()
+        return stat.st_size, stat.st_mtime
+
+
 def init_command_parser(description, args_names):
     
     # Create instance of the ArgumentParser class:
@@ -345,7 +630,7 @@ def check_file_exists(file_path, kill=False):
 
     """
     flag = True
-    if os.path.exists(file_path) is False:
+    if path_exists(file_path) is False:
         flag = False
         f_name = os.path.basename(file_path)
         f_parent = os.path.dirname(file_path)
@@ -374,6 +659,13 @@ def list_dirs_in_path(source_path):
     List with the name of the directories inside source_path.
 
     """
+    # Directories of an indexed (or zipped) Slack export:
+    export, member = get_export_member(source_path)
+    if export is not None:
+        return [name
+                for name in export.listdir(member)
+                if f"{member}/{name}".lstrip("/") in export.dirs]
+
     # Get all non-hidden directories and files in a path:
     lst_src = os.listdir(source_path)
     # Extract items that are indeed directories:
@@ -426,20 +718,26 @@ def check_ch(file_name, source_path):
     return out
 
 
-def make_dest_path(path):
+def make_dest_path(path, replace=True):
     """
     Create the path where all the files will be saved.
 
-    If the path already exists, it deletes it and creates a fresh one.
+    If the path already exists and replace is True, it deletes it and creates
+    a fresh one.
 
     Arguments
     ---------
     path : str
         Path to be created.
 
+    replace : bool (optional. Default is True)
+        Whether to delete the content of the path if it already exists.
+
     """
-    # If the path already exists, remove it:
-    if os.path.exists(path) is True:
+    # If the path already exists, keep it or remove it:
+    if os.path.exists(path) is True and replace is False:
+        print(f'Updating the files in the destination directory "{path}".')
+    elif os.path.exists(path) is True:
         exprt_folder_path = Path(path)
         if exprt_folder_path.is_dir():
             print(f'WARNING: The path "{path}" already exists and it will '
@@ -450,3 +748,156 @@ def make_dest_path(path):
 
     # Create a fresh path:
     Path(f"{path}").mkdir(parents=True, exist_ok=True)
+
+
+def index_export(source_path):
+    """
+    Walk the source directory once and serve later lookups from memory.
+
+    After calling this function, the listings, sizes and modification times
+    of the files in source_path are retrieved from a DirExport instead of the
+    file system. Zip files are always indexed, so nothing is done for them.
+    Nothing is done either if source_path was already indexed.
+
+    Arguments
+    ---------
+    source_path : str
+        Path to the source directory containing all the Slack JSON files.
+
+    """
+    key = source_path.rstrip("/\\")
+    if key not in DIR_EXPORTS and os.path.isdir(source_path) is True:
+        DIR_EXPORTS[key] = DirExport(source_path)
+
+
+def get_export_member(path):
+    """
+    Split a path into the indexed Slack export and the member inside of it.
+
+    A path such as "C:/Users/slack_export.zip/general/2025-01-01.json" points
+    to the file "general/2025-01-01.json" inside "slack_export.zip". The same
+    applies to the source directories indexed with index_export().
+
+    Arguments
+    ---------
+    path : str
+        Path to a file or directory.
+
+    Returns
+    -------
+    export : ZipExport or DirExport
+        Index of the Slack export, or None if the path is not inside an
+        indexed export.
+
+    member : str
+        Path inside the export (or the given path if there is no export).
+
+    """
+    # Source directories indexed with index_export:
+    for source_path, dir_export in DIR_EXPORTS.items():
+        if path.startswith(source_path) and \
+                path[len(source_path):len(source_path)+1] in ("", "/", "\\"):
+            member = path[len(source_path):].replace("\\", "/").strip("/")
+            return dir_export, member
+
+    # Zip files:
+    idx = path.lower().find(".zip")
+    while idx >= 0:
+        zip_path = path[:idx+4]
+        if path[idx+4:idx+5] in ("", "/", "\\"):
+            # Open each zip file once per process (a zip file opened by a
+            # parent process cannot be shared with its child processes):
+            key = (os.path.abspath(zip_path), os.getpid())
+            if key not in ZIP_EXPORTS and os.path.isfile(zip_path) \
+                    and zipfile.is_zipfile(zip_path):
+                ZIP_EXPORTS[key] = ZipExport(zip_path)
+            if key in ZIP_EXPORTS:
+                member = path[idx+4:].replace("\\", "/").strip("/")
+                return ZIP_EXPORTS[key], member
+        idx = path.lower().find(".zip", idx+4)
+    return None, path
+
+
+def path_exists(path):
+    """
+    Check if a path exists, either in a directory or in a zipped export.
+
+    Arguments
+    ---------
+    path : str
+        Path to a file or directory.
+
+    Returns
+    -------
+    Boolean
+
+    """
+    export, member = get_export_member(path)
+    if export is not None:
+        return export.exists(member)
+    return os.path.exists(path)
+
+
+def list_dir(path):
+    """
+    List the names of the entries in a directory or in a zipped export.
+
+    Arguments
+    ---------
+    path : str
+        Path to the directory.
+
+    Returns
+    -------
+    List with the names of the files and directories.
+
+    """
+    export, member = get_export_member(path)
+    if export is not None:
+        return export.listdir(member)
+    return os.listdir(path)
+
+
+def open_file(path):
+    """
+    Open a file for binary reading, either from a directory or a zip file.
+
+    Arguments
+    ---------
+    path : str
+        Path to the file.
+
+    Returns
+    -------
+    File object.
+
+    """
+    export, member = get_export_member(path)
+    if export is not None:
+        return export.open(member)
+    return open(path, "rb")
+
+
+def get_size_mtime(path):
+    """
+    Return the size and modification time of a file.
+
+    Arguments
+    ---------
+    path : str
+        Path to the file, either in a directory or in a zipped export.
+
+    Returns
+    -------
+    size : int
+        Size of the file in bytes.
+
+    mtime : float
+        Timestamp of the last modification of the file.
+
+    """
+    export, member = get_export_member(path)
+    if export is not None:
+        return export.get_size_mtime(member)
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime